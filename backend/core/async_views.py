@@ -0,0 +1,152 @@
+"""
+Async endpoints for the ASGI application.
+
+Same behaviour as the momo_* views in core.views, but the calls to MTN go
+through the asyncio MoMo client and the ORM is used through its async API,
+so one ASGI worker can hold many payment requests in flight without a
+thread per request. The admin notification long-poll waits the same way.
+DRF does not support async views, hence plain Django views returning
+JsonResponse; the public ones apply DRF's default throttles themselves.
+"""
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import Order
+from .momo import MomoError, arequest_to_pay
+from .notifications import await_notifications
+from .payments import apayment_status, await_payment_status, momo_reference, receive_momo_callback
+from .serializers import NotificationSerializer
+
+
+def _json_body(request) -> dict:
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _throttle_wait(request) -> float | None:
+    # DRF's default throttles, as APIView.check_throttles applies them to the
+    # sync momo_* views; shares their cache keys, so both paths count together
+    waits = [throttle.wait() for throttle in (cls() for cls in api_settings.DEFAULT_THROTTLE_CLASSES) if not throttle.allow_request(request, None)]
+    if not waits:
+        return None
+    return max((w for w in waits if w is not None), default=0)
+
+
+async def _throttled(request) -> JsonResponse | None:
+    """A 429 response when the client is over its rate limit, else None."""
+    wait = await sync_to_async(_throttle_wait)(request)
+    if wait is None:
+        return None
+    response = JsonResponse({"detail": f"Request was throttled. Expected available in {math.ceil(wait)} seconds."}, status=429)
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
+async def _is_admin(request) -> bool:
+    # same check as IsAdminUserOrSuper, for views outside DRF
+    try:
+        auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return False
+    return bool(auth and auth[0].is_staff)
+
+
+@csrf_exempt
+@require_POST
+async def momo_initiate(request):
+    throttled = await _throttled(request)
+    if throttled:
+        return throttled
+    data = _json_body(request)
+    oid = data.get("order_id")
+    payer = (data.get("payer_msisdn") or "").strip()
+    if not oid or not payer:
+        return JsonResponse({"detail": "Missing fields"}, status=400)
+    try:
+        o = await Order.objects.aget(id=oid)
+    except (Order.DoesNotExist, ValueError):
+        return JsonResponse({"detail": "Not found."}, status=404)
+    try:
+        ref, http_status, resp = await arequest_to_pay(amount=str(o.total_amount), currency="UGX", phone=payer, external_id=o.reference, payer_message=f"Pay {o.reference}", payee_note="Neesté Order")
+    except MomoError as e:
+        return JsonResponse({"detail": str(e)}, status=503)
+    if http_status != 202:
+        return JsonResponse({"detail": "Payment request was not accepted", "momo_http_status": http_status}, status=502)
+    o.momo_reference_id = ref
+    o.momo_status = "PENDING"
+    o.momo_requested_at = timezone.now()
+    await o.asave(update_fields=["momo_reference_id", "momo_status", "momo_requested_at"])
+    return JsonResponse({"order_id": o.id, "reference_id": ref, "status": "PENDING"})
+
+
+@require_GET
+async def momo_status(request, reference_id):
+    throttled = await _throttled(request)
+    if throttled:
+        return throttled
+    # ?wait=<seconds> holds the request until the status differs from ?since=
+    try:
+        wait = min(float(request.GET.get("wait", 0)), settings.MOMO_STATUS_LONGPOLL_MAX)
+    except ValueError:
+        wait = 0
+    try:
+        if wait > 0:
+            since = request.GET.get("since") or "PENDING"
+            snap = await await_payment_status(reference_id, since.upper(), wait)
+        else:
+            snap = await apayment_status(reference_id)
+    except Http404:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    except MomoError as e:
+        return JsonResponse({"detail": str(e)}, status=503)
+    links = [{"product": name, "url": request.build_absolute_uri(f"/api/download/{token}/")} for name, token in snap["downloads"]]
+    return JsonResponse({"order_id": snap["order_id"], "order_status": snap["order_status"], "momo_status": snap["momo_status"], "download_links": links})
+
+
+@csrf_exempt
+@require_POST
+async def momo_callback(request):
+    # Acknowledge at once; the payment is verified with MoMo in the background
+    throttled = await _throttled(request)
+    if throttled:
+        return throttled
+    data = _json_body(request)
+    ref = momo_reference(data.get("referenceId") or request.headers.get("X-Reference-Id"))
+    if ref:
+        await sync_to_async(receive_momo_callback)(ref, data)
+    return JsonResponse({"status": "OK"}, status=200)
+
+
+@require_GET
+async def admin_notifications_wait(request):
+    # ?since=<cursor>&unread=<count>&wait=<seconds>: held until there is a
+    # newer notification or the unread count changes. Served over WSGI a held
+    # request would hold a server thread, so it answers at once and tells the
+    # client how long to wait before polling again.
+    if not await _is_admin(request):
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    try:
+        since = int(request.GET.get("since", 0))
+        unread = int(request.GET["unread"]) if request.GET.get("unread") else None
+        wait = min(float(request.GET.get("wait", settings.NOTIFICATION_LONGPOLL_MAX)), settings.NOTIFICATION_LONGPOLL_MAX)
+    except ValueError:
+        return JsonResponse({"detail": "Invalid parameters"}, status=400)
+    held = isinstance(request, ASGIRequest)
+    data = await await_notifications(since, unread, wait if held else 0)
+    results = await sync_to_async(lambda: NotificationSerializer(data["results"], many=True).data)()
+    poll_after = 0 if held else settings.NOTIFICATION_POLL_INTERVAL
+    return JsonResponse({"results": results, "unread_count": data["unread_count"], "cursor": data["cursor"], "poll_after": poll_after})
@@ -0,0 +1,85 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+CATALOG_VERSION_KEY = "public:catalog:version"
+ADMIN_DASHBOARD_KEY = "admin:dashboard"
+
+
+def catalog_version() -> int:
+    """
+    Current version of the public catalog (site settings + products).
+
+    The version lives in the shared cache so every worker agrees on it.
+    If it is missing (first boot, eviction) it is seeded from the clock,
+    which guarantees it never collides with a version used before.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached public payload by moving to a new version."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), None)
+
+
+def bump_catalog_version_on_commit():
+    # Bump after commit so a concurrent reader cannot re-cache the old rows
+    transaction.on_commit(bump_catalog_version)
+
+
+def _payload_key(request, name: str, *parts) -> str:
+    # Serializers build absolute URLs and hide fields from non-superusers,
+    # so both the host and the superuser flag are part of the key.
+    user = getattr(request, "user", None)
+    is_superuser = bool(user and user.is_superuser)
+    raw = "|".join(str(p) for p in (request.scheme, request.get_host(), is_superuser, *parts))
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"public:{name}:v{catalog_version()}:{digest}"
+
+
+def cached_payload(request, name: str, build, *parts):
+    """
+    Return the payload for a public endpoint from the cache, building and
+    storing it with `build()` on a miss.
+
+    Args:
+        request: the incoming request (host and user affect the payload)
+        name: endpoint name used as the key prefix
+        build: callable producing a picklable payload
+        *parts: extra values that vary the payload (query params, pk, ...)
+    """
+    key = _payload_key(request, name, *parts)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, settings.PUBLIC_CACHE_TIMEOUT)
+    return payload
+
+
+def cached_snapshot(key: str, build, timeout: int):
+    """
+    Return a short-lived snapshot stored under `key`, rebuilding it with
+    `build()` when missing. A timeout of 0 disables caching.
+    """
+    if not timeout:
+        return build()
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout)
+    return data
+
+
+def invalidate_snapshot_on_commit(key: str):
+    transaction.on_commit(lambda: cache.delete(key))
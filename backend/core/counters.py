@@ -0,0 +1,147 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+
+class BufferedCounter:
+    """
+    Lock-free hit counter backed by the shared cache.
+
+    Hits are accumulated with atomic cache increments (one key per member)
+    and written to the database by `writer` at most once per
+    COUNTER_FLUSH_INTERVAL, so hot read endpoints stay read-only.
+
+    The first hit on a member since the last flush also appends it to a
+    journal: numbered slot keys behind an atomic sequence. A flush reads
+    the slots written since the previous one, so its cost follows the
+    members that were hit, not every member that could have been.
+
+    Args:
+        name: key prefix for this counter
+        writer: callable receiving {member: n} and persisting it
+        timeout: lifetime of pending hits and journal slots in the cache
+    """
+
+    def __init__(self, name: str, writer, timeout: int):
+        self.name = name
+        self.writer = writer
+        self.timeout = timeout
+
+    def _key(self, member) -> str:
+        return f"counter:{self.name}:{member}"
+
+    def _dirty_key(self, member) -> str:
+        return f"counter:{self.name}:dirty:{member}"
+
+    def _slot_key(self, slot: int) -> str:
+        return f"counter:{self.name}:slot:{slot}"
+
+    def record(self, member, n: int = 1):
+        key = self._key(member)
+        if not cache.add(key, n, self.timeout):
+            try:
+                cache.incr(key, n)
+            except ValueError:
+                # expired between add() and incr()
+                cache.add(key, n, self.timeout)
+        # the marker expires too, so a journal slot lost to eviction only
+        # delays the member to a later flush
+        if cache.add(self._dirty_key(member), 1, settings.COUNTER_FLUSH_INTERVAL):
+            self._journal(member)
+        if cache.add(f"counter:{self.name}:gate", 1, settings.COUNTER_FLUSH_INTERVAL):
+            self.flush()
+
+    def _journal(self, member):
+        seq = f"counter:{self.name}:seq"
+        try:
+            slot = cache.incr(seq)
+        except ValueError:
+            cache.add(seq, 0, None)
+            slot = cache.incr(seq)
+        cache.set(self._slot_key(slot), member, self.timeout)
+
+    def _dirty(self) -> tuple:
+        """(members journalled since the last flush, last slot read)"""
+        seq = cache.get(f"counter:{self.name}:seq") or 0
+        done = cache.get(f"counter:{self.name}:flushed") or 0
+        if seq < done:
+            # the sequence was evicted and started over
+            done = 0
+        slots = [self._slot_key(slot) for slot in range(done + 1, seq + 1)]
+        return set(cache.get_many(slots).values()), seq
+
+    def flush(self) -> int:
+        """
+        Write pending hits to the database and return how many were written.
+
+        Only one flush per counter runs at a time. Pending values are
+        decremented (not reset) after the write, so hits recorded while
+        flushing are kept for the next round.
+        """
+        lock = f"counter:{self.name}:lock"
+        if not cache.add(lock, 1, 60):
+            return 0
+        try:
+            members, seq = self._dirty()
+            # cleared before reading the counts: a hit from now on journals
+            # its member again, so it is never left for no flush to find
+            cache.delete_many([self._dirty_key(m) for m in members])
+            keys = {self._key(m): m for m in members}
+            pending = {keys[k]: n for k, n in cache.get_many(list(keys)).items() if n}
+            if pending:
+                with transaction.atomic():
+                    self.writer(pending)
+                for member, n in pending.items():
+                    try:
+                        cache.decr(self._key(member), n)
+                    except ValueError:
+                        # evicted or expired since it was read; its hits are written
+                        pass
+            cache.set(f"counter:{self.name}:flushed", seq, None)
+            return sum(pending.values())
+        finally:
+            cache.delete(lock)
+
+
+def _write_visits(pending: dict):
+    from .models import SiteVisit
+
+    dates = {date.fromisoformat(d): n for d, n in pending.items()}
+    SiteVisit.objects.bulk_create([SiteVisit(date=d, count=0) for d in dates], ignore_conflicts=True)
+    for d, n in dates.items():
+        SiteVisit.objects.filter(date=d).update(count=F("count") + n)
+
+
+def _write_blog_views(pending: dict):
+    from .models import BlogPost
+
+    # One UPDATE ... SET views = views + CASE id WHEN ... for every post
+    increment = Case(
+        *[When(pk=pk, then=Value(n)) for pk, n in pending.items()],
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
+    BlogPost.objects.filter(pk__in=list(pending)).update(views=F("views") + increment)
+
+
+site_visits = BufferedCounter("visits", _write_visits, timeout=8 * 24 * 3600)
+blog_views = BufferedCounter("blog_views", _write_blog_views, timeout=24 * 3600)
+
+# Every buffered counter, flushed by the `flush_counters` command
+COUNTERS = [site_visits, blog_views]
+
+
+def record_site_visit():
+    site_visits.record(timezone.localdate().isoformat())
+
+
+def record_blog_view(post):
+    blog_views.record(post.pk)
+
+
+def flush_counters() -> dict:
+    return {counter.name: counter.flush() for counter in COUNTERS}
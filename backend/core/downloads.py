@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
+
+from .models import DigitalAccessToken
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _attachment(name: str) -> str:
+    return f"attachment; filename*=UTF-8''{quote(name)}"
+
+
+def _etag(size: int, mtime: float) -> str:
+    return f'"{size:x}-{int(mtime * 1000000):x}"'
+
+
+def _byte_range(header: str, size: int):
+    """
+    (start, end) of a single `bytes=` range, inclusive; None for a header
+    we do not serve partially (multiple ranges, garbage), or False when
+    the range cannot be satisfied.
+    """
+    m = _RANGE.match(header.strip())
+    if not m or not any(m.groups()):
+        return None
+    first, last = m.groups()
+    if not first:
+        # suffix range: the last N bytes
+        n = int(last)
+        return (max(size - n, 0), size - 1) if n and size else False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def is_resumption(request) -> bool:
+    """True for a Range request that continues a download already counted."""
+    m = _RANGE.match(request.headers.get("Range", "").strip())
+    return bool(m) and m.group(1) != "0"
+
+
+def _read(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, field_file, filename: str):
+    """
+    Response sending a stored file as an attachment.
+
+    With DOWNLOAD_SERVE_MODE "x-accel" (nginx) or "x-sendfile" (Apache,
+    lighttpd) the transfer is handed to the web server once the caller has
+    authorized it, and no worker is held for its duration. Otherwise the
+    file is streamed from here with an ETag and single-range support
+    (Range, If-Range, If-None-Match), so interrupted downloads can resume.
+    """
+    mode = settings.DOWNLOAD_SERVE_MODE
+    if mode == "x-accel":
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = quote(settings.DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + field_file.name)
+    elif mode == "x-sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = field_file.path
+    else:
+        return _serve_directly(request, field_file.path, filename)
+    response["Content-Type"] = "application/octet-stream"
+    response["Content-Disposition"] = _attachment(filename)
+    return response
+
+
+def _serve_directly(request, path: str, filename: str):
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = _etag(size, stat.st_mtime)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _attachment(filename),
+    }
+
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        return HttpResponse(status=304, headers=headers)
+
+    byte_range = None
+    if "Range" in request.headers:
+        # If-Range: only resume when the file is still the one the client has
+        if_range = request.headers.get("If-Range", "").strip()
+        if not if_range or if_range == etag or (parse_http_date_safe(if_range) or 0) >= int(stat.st_mtime):
+            byte_range = _byte_range(request.headers["Range"], size)
+    if byte_range is False:
+        return HttpResponse(status=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range or (0, size - 1)
+    length = max(end - start + 1, 0)
+    response = StreamingHttpResponse(_read(path, start, length), status=206 if byte_range else 200, content_type="application/octet-stream", headers=headers)
+    response["Content-Length"] = str(length)
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def _record(token_id):
+    try:
+        DigitalAccessToken.objects.filter(pk=token_id).update(
+            used=True, download_count=F("download_count") + 1, last_downloaded_at=timezone.now()
+        )
+    except Exception:
+        logger.exception("Recording download of token %s failed", token_id)
+    finally:
+        close_old_connections()
+
+
+def record_download(token):
+    """Count a download from a background thread; the response never waits for it."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = ThreadPoolExecutor(max_workers=2, thread_name_prefix="downloads")
+    _recorder.submit(_record, token.pk)
@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Derivative widths; an image is never scaled up past its own width
+VARIANTS = {"thumb": 320, "card": 640, "full": 1600}
+FORMATS = (("webp", "WEBP", {"quality": 80, "method": 4}), ("jpeg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}))
+DERIVATIVES_DIR = "derivatives"
+
+
+def image_fields():
+    """(model, image field, variants field) for every image that gets derivatives."""
+    from .models import BlogPost, Product, SiteSettings
+
+    return [
+        (Product, "image", "image_variants"),
+        (BlogPost, "featured_image", "featured_image_variants"),
+        (SiteSettings, "logo", "logo_variants"),
+    ]
+
+
+def _encode(im, fmt: str, options: dict) -> bytes:
+    if fmt == "JPEG" and im.mode != "RGB":
+        # JPEG has no alpha: flatten onto white
+        rgba = im.convert("RGBA")
+        flat = Image.new("RGB", rgba.size, (255, 255, 255))
+        flat.paste(rgba, mask=rgba.getchannel("A"))
+        im = flat
+    buf = BytesIO()
+    im.save(buf, fmt, **options)
+    return buf.getvalue()
+
+
+def build_variants(name: str) -> dict:
+    """
+    Resize the stored image `name` into every variant and format.
+
+    Files are named after a hash of the source bytes, so an image that was
+    processed before (or uploaded twice) is not encoded again.
+    Touches storage only, never the database, so it is safe to run in a
+    worker process.
+
+    Returns:
+        dict: {"source": name, "variants": {variant: {"width", "webp", "jpeg"}}}
+    """
+    with default_storage.open(name, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:24]
+    im = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    variants = {}
+    for variant, max_width in VARIANTS.items():
+        width = min(max_width, im.width)
+        entry = {"width": width}
+        for ext, fmt, options in FORMATS:
+            path = f"{DERIVATIVES_DIR}/{digest[:2]}/{digest}-{variant}.{ext}"
+            if not default_storage.exists(path):
+                resized = im if width == im.width else im.resize((width, max(round(im.height * width / im.width), 1)), Image.LANCZOS)
+                path = default_storage.save(path, ContentFile(_encode(resized, fmt, options)))
+            entry[ext] = path
+        variants[variant] = entry
+    return {"source": name, "variants": variants}
+
+
+def store_variants(model, pk, variants_field: str, result: dict):
+    from .cache import bump_catalog_version
+    from .models import BlogPost
+
+    # update() keeps post_save (and with it another round of generation) out
+    model.objects.filter(pk=pk).update(**{variants_field: result})
+    if model is not BlogPost:
+        bump_catalog_version()
+
+
+def refresh_variants(instance, image_field: str, variants_field: str) -> bool:
+    """
+    Build the derivatives of one instance's image if they are missing or
+    belong to an older upload. Returns True if anything was stored.
+    """
+    image = getattr(instance, image_field)
+    current = getattr(instance, variants_field) or {}
+    if not image:
+        if current:
+            store_variants(type(instance), instance.pk, variants_field, {})
+            return True
+        return False
+    if current.get("source") == image.name:
+        return False
+    store_variants(type(instance), instance.pk, variants_field, build_variants(image.name))
+    return True
+
+
+_builder = None
+_builder_lock = threading.Lock()
+
+
+def _refresh_in_thread(model, pk, image_field, variants_field):
+    try:
+        instance = model.objects.filter(pk=pk).first()
+        if instance is not None:
+            refresh_variants(instance, image_field, variants_field)
+    except Exception:
+        logger.exception("Building image derivatives for %s %s failed", model.__name__, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance, image_field: str, variants_field: str):
+    """After commit, build the derivatives of a new upload off the request thread."""
+    global _builder
+    image = getattr(instance, image_field)
+    current = getattr(instance, variants_field) or {}
+    if (image.name if image else None) == current.get("source"):
+        return
+    if _builder is None:
+        with _builder_lock:
+            if _builder is None:
+                _builder = ThreadPoolExecutor(max_workers=2, thread_name_prefix="images")
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: _builder.submit(_refresh_in_thread, model, pk, image_field, variants_field))
+
+
+def srcset(request, image, variants: dict) -> dict | None:
+    """
+    {"webp": "<url> 320w, ...", "jpeg": "..."} for an image's derivatives,
+    ready for <img srcset> / <source srcset>; None until the derivatives
+    of the current upload are built.
+    """
+    variants = variants or {}
+    if not image or request is None or variants.get("source") != image.name:
+        return None
+    entries = variants["variants"]
+    sets = {}
+    for ext, _, _ in FORMATS:
+        widths = {}
+        for entry in entries.values():
+            widths.setdefault(entry["width"], entry[ext])
+        sets[ext] = ", ".join(f"{request.build_absolute_uri(default_storage.url(name))} {w}w" for w, name in sorted(widths.items()))
+    return sets
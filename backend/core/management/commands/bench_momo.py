@@ -0,0 +1,94 @@
+import asyncio
+import multiprocessing
+import time
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils.crypto import get_random_string
+
+from core import momo
+from core.models import Order
+from core.momo_emulator import MomoEmulator
+
+
+class Command(BaseCommand):
+    help = "Compare MoMo initiate/status throughput of the sync and the async views, both served by the ASGI application"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per run")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight")
+        parser.add_argument("--latency", type=float, default=0.2, help="Seconds the emulated MoMo takes per call")
+        parser.add_argument("--jitter", type=float, default=0.1, help="Extra random seconds per MoMo call")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of MoMo calls failing with a 500")
+        parser.add_argument("--settle-after", type=float, default=1.0, help="Seconds before a payment leaves PENDING")
+
+    def handle(self, *args, **options):
+        emulator = MomoEmulator(
+            latency=options["latency"],
+            jitter=options["jitter"],
+            failure_rate=options["failure_rate"],
+            settle_after=options["settle_after"],
+        )
+        # served from a forked process so the emulator does not compete for our GIL
+        emulator_process = multiprocessing.get_context("fork").Process(target=emulator.serve_forever, daemon=True)
+        emulator_process.start()
+        emulator.server.socket.close()
+
+        momo.MOMO_BASE_URL = emulator.base_url
+        momo.MOMO_COLLECTION_SUB_KEY = momo.MOMO_COLLECTION_SUB_KEY or "bench"
+        momo.MOMO_API_USER = momo.MOMO_API_USER or "bench"
+        momo.MOMO_API_KEY = momo.MOMO_API_KEY or "bench"
+        momo.MOMO_CALLBACK_URL = ""
+        momo._client = None
+        momo._async_clients.clear()
+        momo._token.update(value=None, exp=0)
+        cache.delete(momo.TOKEN_CACHE_KEY)
+
+        host = settings.ALLOWED_HOSTS[0].lstrip(".").replace("*", "") or "localhost"
+        try:
+            for name, prefix in (("sync views", "/api/momo/"), ("async views", "/api/momo/async/")):
+                orders = Order.objects.bulk_create(
+                    Order(reference=get_random_string(10).upper(), full_name="Benchmark", phone="256700000000", total_amount=1000)
+                    for _ in range(options["requests"])
+                )
+                try:
+                    for phase, elapsed, failed in self._run(prefix, orders, host, options):
+                        self.stdout.write(
+                            f"{name} {phase}: {options['requests']} requests in {elapsed:.2f}s, "
+                            f"{options['requests'] / elapsed:.1f} req/s, {failed} failed"
+                        )
+                finally:
+                    Order.objects.filter(id__in=[o.id for o in orders]).delete()
+        finally:
+            emulator_process.terminate()
+
+    def _run(self, prefix, orders, host, options):
+        # through the ASGI application the server runs: sync views take a
+        # thread per request, async views wait on the worker's event loop
+        from neeste_api.asgi import application
+
+        async def run(calls, method):
+            sem = asyncio.Semaphore(options["concurrency"])
+            transport = httpx.ASGITransport(app=application)
+            async with httpx.AsyncClient(transport=transport, base_url=f"http://{host}", timeout=60) as client:
+                async def call(i, url, body):
+                    async with sem:
+                        # a distinct client address per request keeps the anon throttle out of the numbers
+                        headers = {"X-Forwarded-For": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"}
+                        resp = await client.request(method, url, json=body, headers=headers)
+                        return resp.json() if resp.status_code == 200 else None
+
+                return await asyncio.gather(*(call(i, url, body) for i, (url, body) in enumerate(calls)))
+
+        started = time.perf_counter()
+        results = asyncio.run(run(
+            [(f"{prefix}initiate/", {"order_id": o.id, "payer_msisdn": "256700000000"}) for o in orders], "POST"
+        ))
+        yield "initiate", time.perf_counter() - started, results.count(None)
+
+        refs = [r["reference_id"] for r in results if r]
+        started = time.perf_counter()
+        results = asyncio.run(run([(f"{prefix}status/{ref}/", None) for ref in refs], "GET"))
+        yield "status", time.perf_counter() - started, results.count(None) + len(orders) - len(refs)
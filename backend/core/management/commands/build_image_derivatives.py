@@ -0,0 +1,42 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.images import build_variants, image_fields, store_variants
+
+
+class Command(BaseCommand):
+    help = "Build the resized WebP/JPEG variants of existing product, blog and logo images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Images resized in parallel")
+        parser.add_argument("--force", action="store_true", help="Rebuild images that already have variants")
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, image_field, variants_field in image_fields():
+            rows = model.objects.exclude(**{f"{image_field}__isnull": True}).exclude(**{image_field: ""})
+            for pk, name, current in rows.values_list("pk", image_field, variants_field).iterator():
+                if options["force"] or (current or {}).get("source") != name:
+                    jobs.append((model, pk, variants_field, name))
+        if not jobs:
+            self.stdout.write("Every image already has its variants")
+            return
+
+        # resizing is CPU bound: one process per core, DB writes stay in this one
+        connections.close_all()
+        built = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], mp_context=multiprocessing.get_context("fork")) as pool:
+            futures = {pool.submit(build_variants, name): (model, pk, variants_field, name) for model, pk, variants_field, name in jobs}
+            for future in as_completed(futures):
+                model, pk, variants_field, name = futures[future]
+                try:
+                    store_variants(model, pk, variants_field, future.result())
+                    built += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {pk} ({name}): {e}")
+        self.stdout.write(f"built variants for {built} images, {failed} failed")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import flush_counters
+
+
+class Command(BaseCommand):
+    help = "Write buffered site visit and blog view counts to the database"
+
+    def handle(self, *args, **options):
+        for name, n in flush_counters().items():
+            self.stdout.write(f"{name}: flushed {n}")
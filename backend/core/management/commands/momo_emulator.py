@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.momo_emulator import MomoEmulator
+
+
+class Command(BaseCommand):
+    help = "Run a local MoMo Collection API emulator (point MOMO_BASE_URL at it)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.2, help="Seconds per API call")
+        parser.add_argument("--jitter", type=float, default=0.1, help="Extra random seconds per API call")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls answered with a 500")
+        parser.add_argument("--settle-after", type=float, default=5.0, help="Seconds before a payment leaves PENDING")
+        parser.add_argument("--success-rate", type=float, default=1.0, help="Share of payments ending SUCCESSFUL")
+        parser.add_argument("--callback-duplicates", type=int, default=0, help="Extra copies of every callback")
+
+    def handle(self, *args, **options):
+        emulator = MomoEmulator(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            jitter=options["jitter"],
+            failure_rate=options["failure_rate"],
+            settle_after=options["settle_after"],
+            success_rate=options["success_rate"],
+            callback_duplicates=options["callback_duplicates"],
+        )
+        self.stdout.write(f"MoMo emulator on {emulator.base_url} (set MOMO_BASE_URL={emulator.base_url})")
+        try:
+            emulator.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stdout.write(str(emulator.stats))
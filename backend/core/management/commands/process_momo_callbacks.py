@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.payments import process_momo_callbacks
+
+
+class Command(BaseCommand):
+    help = "Verify received MoMo callbacks with MoMo and apply the payment status"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Callbacks per run")
+        parser.add_argument("--loop", action="store_true", help="Keep processing")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between runs with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            report = process_momo_callbacks(limit=options["limit"])
+            self.stdout.write("verified {verified}, errors {errors}, backlog {backlog}".format(**report))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
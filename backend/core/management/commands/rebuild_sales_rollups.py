@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollups from order history"
+
+    def handle(self, *args, **options):
+        days, product_days = rebuild_sales_rollups()
+        self.stdout.write(f"Rebuilt {days} days and {product_days} product/day rows")
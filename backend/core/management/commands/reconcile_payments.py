@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.payments import reconcile_pending_payments
+
+
+class Command(BaseCommand):
+    help = "Check MoMo payments stuck in PENDING and apply their final status"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Orders per batch")
+        parser.add_argument("--workers", type=int, help="Concurrent MoMo status checks")
+        parser.add_argument("--max-age", type=int, help="Seconds after which a PENDING request is expired")
+        parser.add_argument("--loop", action="store_true", help="Keep reconciling")
+        parser.add_argument("--interval", type=float, default=60.0, help="Seconds between runs with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            report = reconcile_pending_payments(
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                max_age=options["max_age"],
+            )
+            self.stdout.write(
+                "checked {checked} ({throughput}/s), paid {paid}, failed {failed}, errors {errors}, "
+                "expired {expired}, backlog {backlog}".format(**report)
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.newsletter import deliver_campaign, run_pending_campaigns
+
+
+class Command(BaseCommand):
+    help = "Send queued newsletter campaigns"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--campaign", type=int, help="Send (or resume) a single campaign by id")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new campaigns")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        if options["campaign"]:
+            campaign = deliver_campaign(options["campaign"], resume=True)
+            if campaign is None:
+                self.stdout.write(f"Campaign {options['campaign']} is not queued")
+            else:
+                self.stdout.write(f"Campaign {campaign.pk}: {campaign.sent_count} sent, {campaign.failed_count} failed")
+            return
+        while True:
+            done = run_pending_campaigns()
+            if done:
+                self.stdout.write(f"Sent {done} campaign(s)")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,96 @@
+# Generated by Django 5.0.8 on 2026-10-17 16:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_add_all_theme_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('NEW_ORDER', 'New Order'), ('PAYMENT_RECEIVED', 'Payment Received'), ('CONTACT_SUBMISSION', 'Contact Submission'), ('NEWSLETTER_SUBSCRIPTION', 'Newsletter Subscription')], max_length=50)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('link', models.CharField(blank=True, max_length=200)),
+                ('read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='email_from_email',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='email_from_name',
+            field=models.CharField(blank=True, default='Neesté', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='email_host',
+            field=models.CharField(blank=True, default='smtp.gmail.com', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='email_host_password',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='email_host_user',
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='email_port',
+            field=models.IntegerField(default=587),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='email_use_tls',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='visit_tracking_enabled',
+            field=models.BooleanField(default=False, help_text='Enable visit tracking (turn on when site goes live)'),
+        ),
+        migrations.AlterField(
+            model_name='sitesettings',
+            name='secondary_color',
+            field=models.CharField(default='#0b1220', help_text='Background color (hex code)', max_length=7),
+        ),
+        migrations.AlterField(
+            model_name='sitevisit',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.CreateModel(
+            name='EmailCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('content', models.TextField()),
+                ('recipients_count', models.IntegerField(default=0)),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='email_campaigns', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-sent_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.8 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_sitevisit_local_date_and_model_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('paid_orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('quantity_sold', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('paid_orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('quantity_sold', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='core.product')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('date', 'product')},
+            },
+        ),
+    ]
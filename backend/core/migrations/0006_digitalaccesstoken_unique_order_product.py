@@ -0,0 +1,31 @@
+# Generated by Django 5.0.8 on 2026-10-17 16:07
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def delete_duplicate_tokens(apps, schema_editor):
+    # Keep the oldest token per (order, product) so the constraint can be added
+    DigitalAccessToken = apps.get_model('core', 'DigitalAccessToken')
+    dupes = (
+        DigitalAccessToken.objects.values('order_id', 'product_id')
+        .annotate(n=Count('id'), keep=Min('id'))
+        .filter(n__gt=1)
+    )
+    for row in dupes:
+        DigitalAccessToken.objects.filter(order_id=row['order_id'], product_id=row['product_id']).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_tokens, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='digitalaccesstoken',
+            unique_together={('order', 'product')},
+        ),
+    ]
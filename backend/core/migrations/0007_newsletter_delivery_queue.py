@@ -0,0 +1,71 @@
+# Generated by Django 5.0.8 on 2026-10-17 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_campaigns_sent(apps, schema_editor):
+    # Campaigns created before the queue were sent synchronously
+    EmailCampaign = apps.get_model('core', 'EmailCampaign')
+    EmailCampaign.objects.update(status='SENT', sent_count=F('recipients_count'), queued_count=F('recipients_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_digitalaccesstoken_unique_order_product'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='failed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='queued_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='recipient_ids',
+            field=models.JSONField(blank=True, default=list, help_text='Subscriber ids to send to (empty = all)'),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='sent_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='QUEUED', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='CampaignDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='core.emailcampaign')),
+            ],
+            options={
+                'unique_together': {('campaign', 'email')},
+            },
+        ),
+        migrations.RunPython(mark_existing_campaigns_sent, migrations.RunPython.noop),
+    ]
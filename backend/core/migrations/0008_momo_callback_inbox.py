@@ -0,0 +1,32 @@
+# Generated by Django 5.0.8 on 2026-10-17 16:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_newsletter_delivery_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MomoCallback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference_id', models.CharField(max_length=64, unique=True)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('received_count', models.PositiveIntegerField(default=1)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('last_received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['-received_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.8 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_momo_callback_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digitalaccesstoken',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='digitalaccesstoken',
+            name='last_downloaded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.8 on 2026-10-17 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_digitalaccesstoken_download_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='featured_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
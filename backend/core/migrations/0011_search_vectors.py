@@ -0,0 +1,41 @@
+# Generated by Django 5.0.8 on 2026-10-17 17:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def fill_search_vectors(apps, schema_editor):
+    from core.search import blog_vector, product_vector
+
+    apps.get_model("core", "BlogPost").objects.update(search_vector=blog_vector())
+    apps.get_model("core", "Product").objects.update(search_vector=product_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blogpost_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_gin'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.8 on 2026-10-17 18:10
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_search_vectors'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['reference'], name='order_reference_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone'], name='order_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['full_name'], name='order_full_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['email'], name='contact_email_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='contact_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['email'], name='subscriber_email_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
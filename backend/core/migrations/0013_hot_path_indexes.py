@@ -0,0 +1,49 @@
+# Generated by Django 5.0.8 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('momo_reference_id', ''), _negated=True), fields=['momo_reference_id'], name='order_momo_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('momo_status', 'PENDING'), ('status', 'CREATED')), fields=['id'], name='order_momo_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['status', 'published_at', 'id'], name='blogpost_status_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='momocallback',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['last_received_at'], name='momo_callback_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['created_at', 'id'], name='contact_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(condition=models.Q(('read', False)), fields=['created_at'], name='contact_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['read', 'created_at'], name='notification_read_idx'),
+        ),
+    ]
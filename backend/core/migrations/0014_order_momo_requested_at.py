@@ -0,0 +1,26 @@
+# Generated by Django 5.0.8 on 2026-10-17 19:30
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_requested_at(apps, schema_editor):
+    # the initiation time of older requests was not kept; the order's creation is the closest bound
+    Order = apps.get_model("core", "Order")
+    Order.objects.exclude(momo_reference_id="").update(momo_requested_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='momo_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_requested_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.8 on 2026-10-17 19:45
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_heartbeat(apps, schema_editor):
+    # campaigns already stuck in SENDING become resumable once started_at is stale
+    EmailCampaign = apps.get_model("core", "EmailCampaign")
+    EmailCampaign.objects.filter(status="SENDING").update(heartbeat_at=Coalesce("started_at", "sent_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_order_momo_requested_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailcampaign',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last progress of the worker sending it', null=True),
+        ),
+        migrations.RunPython(backfill_heartbeat, migrations.RunPython.noop),
+    ]
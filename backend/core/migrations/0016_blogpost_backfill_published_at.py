@@ -0,0 +1,21 @@
+# Generated by Django 5.0.8 on 2026-10-17 20:00
+
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_published_at(apps, schema_editor):
+    # posts published outside the admin API never got a date; their creation is the closest one
+    BlogPost = apps.get_model("core", "BlogPost")
+    BlogPost.objects.filter(status="PUBLISHED", published_at__isnull=True).update(published_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_emailcampaign_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+    ]
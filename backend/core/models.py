@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.text import slugify
 
@@ -7,6 +10,7 @@ class SiteSettings(models.Model):
     site_title = models.CharField(max_length=120, default="Neesté")
     tagline = models.CharField(max_length=255, blank=True)
     logo = models.ImageField(upload_to="logo/", blank=True, null=True)
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)
     favicon = models.ImageField(upload_to="favicon/", blank=True, null=True, help_text="Website favicon (32x32 or 64x64 pixels)")
     
     hero_title = models.CharField(max_length=255, blank=True)
@@ -70,9 +74,16 @@ class Product(models.Model):
     type = models.CharField(max_length=20, choices=PRODUCT_TYPES)
     file = models.FileField(upload_to="digital/", blank=True, null=True)
     image = models.ImageField(upload_to="products/", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # name + description, kept up to date on save (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [GinIndex(fields=["search_vector"], name="product_search_gin")]
+
     def __str__(self):
         return self.name
 
@@ -89,6 +100,7 @@ class BlogPost(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=250, unique=True, blank=True)
     featured_image = models.ImageField(upload_to="blog/", blank=True, null=True)
+    featured_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     excerpt = models.TextField(max_length=300, blank=True, help_text="Short description for listings")
     content = models.TextField(help_text="Rich text content")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=DRAFT)
@@ -102,9 +114,17 @@ class BlogPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
+
+    # title + excerpt + content, kept up to date on save (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="blogpost_search_gin"),
+            # the public blog: published posts, newest first
+            models.Index(fields=["status", "published_at", "id"], name="blogpost_status_pub_idx"),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -115,6 +135,9 @@ class BlogPost(models.Model):
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
+        # the public blog pages on published_at, so a published post always has one
+        if self.status == self.PUBLISHED and self.published_at is None:
+            self.published_at = timezone.now()
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -125,6 +148,9 @@ class NewsletterSubscriber(models.Model):
     email = models.EmailField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [GinIndex(fields=["email"], name="subscriber_email_trgm", opclasses=["gin_trgm_ops"])]
+
     def __str__(self):
         return self.email
 
@@ -149,14 +175,42 @@ class Order(models.Model):
     momo_reference_id = models.CharField(max_length=64, blank=True)
     momo_status = models.CharField(max_length=32, blank=True)
     momo_financial_transaction_id = models.CharField(max_length=64, blank=True)
+    momo_requested_at = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # trigram indexes behind the admin order lookup (core.search.fuzzy_lookup)
+        indexes = [
+            GinIndex(fields=["reference"], name="order_reference_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["phone"], name="order_phone_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["full_name"], name="order_full_name_trgm", opclasses=["gin_trgm_ops"]),
+            # reports and dashboards: orders of a status in a period
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            # admin order list and recent orders, newest first
+            models.Index(fields=["created_at", "id"], name="order_created_id_idx"),
+            # momo_status, callbacks and reconciliation look orders up by payment
+            models.Index(fields=["momo_reference_id"], name="order_momo_ref_idx", condition=~models.Q(momo_reference_id="")),
+            models.Index(fields=["id"], name="order_momo_pending_idx", condition=models.Q(status="CREATED", momo_status="PENDING")),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so saves can tell a PAID transition apart
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.reference:
             self.reference = get_random_string(10).upper()
         super().save(*args, **kwargs)
 
+    @property
+    def became_paid(self) -> bool:
+        """True if the status is PAID but was not when the order was loaded."""
+        return self.status == self.PAID and getattr(self, "_loaded_status", None) != self.PAID
+
     def __str__(self):
         return self.reference
 
@@ -176,15 +230,44 @@ class DigitalAccessToken(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     token = models.CharField(max_length=64, unique=True)
     used = models.BooleanField(default=False)
+    download_count = models.PositiveIntegerField(default=0)
+    last_downloaded_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        unique_together = ["order", "product"]
+
     def __str__(self):
         return f"{self.product.name} ({self.token})"
 
 
+class MomoCallback(models.Model):
+    """Inbox of MoMo payment callbacks, one row per request-to-pay however often MTN calls"""
+    reference_id = models.CharField(max_length=64, unique=True)
+    payload = models.JSONField(default=dict, blank=True)
+    received_count = models.PositiveIntegerField(default=1)
+    received_at = models.DateTimeField(auto_now_add=True)
+    last_received_at = models.DateTimeField(default=timezone.now)
+    # set while a worker verifies the payment with MoMo
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-received_at"]
+        indexes = [
+            # the callback worker's backlog of unprocessed rows
+            models.Index(fields=["last_received_at"], name="momo_callback_pending_idx", condition=models.Q(processed_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.reference_id} (x{self.received_count})"
+
+
 class SiteVisit(models.Model):
     """Track unique site visits per day"""
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=timezone.localdate)
     count = models.PositiveIntegerField(default=0)
     
     class Meta:
@@ -195,6 +278,37 @@ class SiteVisit(models.Model):
         return f"{self.date}: {self.count} visits"
 
 
+class DailySales(models.Model):
+    """Order totals per day, kept in step with orders as they are created and paid"""
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    paid_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+    quantity_sold = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"{self.date}: {self.revenue} ({self.paid_orders} paid)"
+
+
+class DailyProductSales(models.Model):
+    """Paid sales per day and product"""
+    date = models.DateField()
+    product = models.ForeignKey(Product, related_name="daily_sales", on_delete=models.CASCADE)
+    paid_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+    quantity_sold = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        unique_together = ["date", "product"]
+
+    def __str__(self):
+        return f"{self.date}: {self.product.name} x{self.quantity_sold}"
+
+
 class ContactSubmission(models.Model):
     """Store contact form submissions"""
     name = models.CharField(max_length=120)
@@ -206,6 +320,13 @@ class ContactSubmission(models.Model):
     
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["email"], name="contact_email_trgm", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["name"], name="contact_name_trgm", opclasses=["gin_trgm_ops"]),
+            models.Index(fields=["created_at", "id"], name="contact_created_id_idx"),
+            # unread count on the dashboard
+            models.Index(fields=["created_at"], name="contact_unread_idx", condition=models.Q(read=False)),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.subject or 'No subject'}"
@@ -236,6 +357,9 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["read", "created_at"], name="notification_read_idx"),
+        ]
     
     def __str__(self):
         return f"{self.get_type_display()} - {self.title}"
@@ -243,14 +367,61 @@ class Notification(models.Model):
 
 class EmailCampaign(models.Model):
     """Track sent email campaigns"""
+    QUEUED = "QUEUED"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+    STATUS_CHOICES = (
+        (QUEUED, "Queued"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    )
+
     subject = models.CharField(max_length=200)
     content = models.TextField()
     recipients_count = models.IntegerField(default=0)
     sent_at = models.DateTimeField(auto_now_add=True)
     sent_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, related_name='email_campaigns')
+
+    # Delivery progress, updated by the newsletter worker
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    recipient_ids = models.JSONField(default=list, blank=True, help_text="Subscriber ids to send to (empty = all)")
+    queued_count = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress of the worker sending it")
     
     class Meta:
         ordering = ["-sent_at"]
     
     def __str__(self):
         return f"{self.subject} - {self.sent_at.strftime('%Y-%m-%d')}"
+
+
+class CampaignDelivery(models.Model):
+    """One recipient of an email campaign and the outcome of sending to them"""
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    )
+
+    campaign = models.ForeignKey(EmailCampaign, related_name="deliveries", on_delete=models.CASCADE)
+    email = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ["campaign", "email"]
+
+    def __str__(self):
+        return f"{self.email} ({self.status})"
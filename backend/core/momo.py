@@ -1,10 +1,20 @@
+import asyncio
 import base64
 import json
+import logging
 import os
+import random
+import threading
 import time
 import uuid
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+import weakref
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 MOMO_BASE_URL = os.getenv("MOMO_BASE_URL", "https://sandbox.momodeveloper.mtn.com")
@@ -16,73 +26,336 @@ MOMO_API_KEY = os.getenv("MOMO_API_KEY", "")
 # Used by your backend webhook endpoint (must be public if MoMo calls it)
 MOMO_CALLBACK_URL = os.getenv("MOMO_CALLBACK_URL", "")
 
-# Token cache
+# HTTP client tuning
+MOMO_CONNECT_TIMEOUT = float(os.getenv("MOMO_CONNECT_TIMEOUT", "3"))
+MOMO_READ_TIMEOUT = float(os.getenv("MOMO_READ_TIMEOUT", "10"))
+MOMO_GET_RETRIES = int(os.getenv("MOMO_GET_RETRIES", "2"))
+MOMO_POOL_SIZE = int(os.getenv("MOMO_POOL_SIZE", "20"))
+MOMO_ASYNC_POOL_SIZE = int(os.getenv("MOMO_ASYNC_POOL_SIZE", "200"))
+MOMO_BREAKER_THRESHOLD = int(os.getenv("MOMO_BREAKER_THRESHOLD", "5"))
+MOMO_BREAKER_RESET = float(os.getenv("MOMO_BREAKER_RESET", "30"))
+
+# Refresh the access token this many seconds before it expires
+MOMO_TOKEN_REFRESH_MARGIN = int(os.getenv("MOMO_TOKEN_REFRESH_MARGIN", "300"))
+
+logger = logging.getLogger(__name__)
+
+# Token cache: shared by all workers in the Django cache, plus a local copy
+TOKEN_CACHE_KEY = "momo:token"
+TOKEN_LOCK_KEY = "momo:token:lock"
 _token = {"value": None, "exp": 0}
 
 
-def _http(method: str, url: str, headers=None, data: dict | None = None):
-    headers = headers or {}
-    body = None
-    if data is not None:
-        body = json.dumps(data).encode("utf-8")
-        headers["Content-Type"] = "application/json"
+class MomoError(RuntimeError):
+    """MoMo could not be reached or is misconfigured."""
+
+
+class MomoUnavailable(MomoError):
+    """The circuit breaker is open: MoMo is failing and calls are skipped."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the provider is degraded.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    every call is rejected for `reset_timeout` seconds. Then one trial call
+    is let through (half-open): success closes the breaker, failure opens
+    it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _ClientBase:
+    """Circuit breaker, metrics and response decoding shared by both clients."""
+
+    def __init__(self, base_url, breaker):
+        self.base_url = (base_url or MOMO_BASE_URL).rstrip("/")
+        self.breaker = breaker or _breaker
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def _record(self, op: str, outcome: str, elapsed_ms: float):
+        with self._metrics_lock:
+            m = self._metrics.setdefault(op, {"calls": 0, "outcomes": {}, "total_ms": 0.0, "max_ms": 0.0})
+            m["calls"] += 1
+            m["outcomes"][outcome] = m["outcomes"].get(outcome, 0) + 1
+            m["total_ms"] += elapsed_ms
+            m["max_ms"] = max(m["max_ms"], elapsed_ms)
+        logger.info("momo %s %s %.0fms", op, outcome, elapsed_ms)
+
+    def metrics(self) -> dict:
+        """Per-operation call counts, outcomes and latency (ms)."""
+        with self._metrics_lock:
+            return {
+                op: {**m, "outcomes": dict(m["outcomes"]), "avg_ms": m["total_ms"] / m["calls"] if m["calls"] else 0}
+                for op, m in self._metrics.items()
+            }
 
-    req = Request(url, data=body, method=method)
-    for k, v in headers.items():
-        req.add_header(k, v)
+    def _check_breaker(self, op: str):
+        if not self.breaker.allow():
+            self._record(op, "circuit_open", 0)
+            raise MomoUnavailable("MoMo is unavailable, try again shortly")
 
-    try:
-        with urlopen(req, timeout=60) as resp:
-            raw = resp.read().decode("utf-8") if resp.readable() else ""
+    def _failed(self, op: str, error: Exception, started: float):
+        self.breaker.record_failure()
+        self._record(op, type(error).__name__, (time.monotonic() - started) * 1000)
+        return 0, {"error": True, "raw": str(error)}
+
+    def _result(self, op: str, status: int, content: bytes, text: str, started: float):
+        if status >= 500 or status == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self._record(op, str(status), (time.monotonic() - started) * 1000)
+
+        if status >= 400:
+            return status, {"error": True, "raw": text}
+        if not content:
+            return status, {}
+        try:
+            return status, json.loads(content)
+        except ValueError:
+            return status, {"raw": text}
+
+
+class MomoClient(_ClientBase):
+    """
+    Keep-alive HTTP client for the MoMo Collection API.
+
+    Connections are pooled per host, connect and read timeouts are separate,
+    idempotent GETs are retried with jittered exponential backoff, and a
+    circuit breaker rejects calls while MoMo keeps failing. Every call is
+    logged and counted in `metrics()`.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        connect_timeout: float = MOMO_CONNECT_TIMEOUT,
+        read_timeout: float = MOMO_READ_TIMEOUT,
+        get_retries: int = MOMO_GET_RETRIES,
+        pool_size: int = MOMO_POOL_SIZE,
+        breaker: CircuitBreaker | None = None,
+    ):
+        super().__init__(base_url, breaker)
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=get_retries,
+            allowed_methods=frozenset({"GET"}),
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=0.2,
+            backoff_jitter=0.3,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def call(self, op: str, method: str, path: str, headers=None, data: dict | None = None):
+        """
+        Perform one API call.
+
+        Returns:
+            tuple: (http_status, payload). Network failures give status 0,
+            like HTTP errors they carry {"error": True, "raw": ...}.
+
+        Raises:
+            MomoUnavailable: the circuit breaker is open
+        """
+        self._check_breaker(op)
+        started = time.monotonic()
+        try:
+            resp = self.session.request(method, f"{self.base_url}{path}", headers=headers, json=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            return self._failed(op, e, started)
+        return self._result(op, resp.status_code, resp.content, resp.text, started)
+
+
+class AsyncMomoClient(_ClientBase):
+    """
+    asyncio counterpart of MomoClient, for the async views.
+
+    Shares the process-wide circuit breaker with MomoClient. GET retries
+    use the same jittered exponential backoff, slept with asyncio.sleep so
+    the event loop keeps serving other requests.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        connect_timeout: float = MOMO_CONNECT_TIMEOUT,
+        read_timeout: float = MOMO_READ_TIMEOUT,
+        get_retries: int = MOMO_GET_RETRIES,
+        pool_size: int = MOMO_ASYNC_POOL_SIZE,
+        breaker: CircuitBreaker | None = None,
+    ):
+        super().__init__(base_url, breaker)
+        self.get_retries = get_retries
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def call(self, op: str, method: str, path: str, headers=None, data: dict | None = None):
+        """Same contract as MomoClient.call."""
+        self._check_breaker(op)
+        attempts = 1 + (self.get_retries if method == "GET" else 0)
+        for attempt in range(attempts):
+            started = time.monotonic()
+            last_try = attempt == attempts - 1
             try:
-                return resp.status, json.loads(raw) if raw else {}
-            except json.JSONDecodeError:
-                return resp.status, {"raw": raw}
-    except HTTPError as e:
-        raw = e.read().decode("utf-8") if hasattr(e, "read") else ""
-        return e.code, {"error": True, "raw": raw}
-    except URLError as e:
-        return 0, {"error": True, "raw": str(e)}
+                resp = await self.http.request(method, path, headers=headers, json=data)
+            except httpx.HTTPError as e:
+                if last_try:
+                    return self._failed(op, e, started)
+            else:
+                if last_try or resp.status_code not in RETRY_STATUSES:
+                    return self._result(op, resp.status_code, resp.content, resp.text, started)
+            await asyncio.sleep(0.2 * (2 ** attempt) + random.uniform(0, 0.3))
 
 
-def get_access_token() -> str:
-    global _token
-    now = int(time.time())
-    if _token["value"] and _token["exp"] > now + 30:
-        return _token["value"]
+_breaker = CircuitBreaker(MOMO_BREAKER_THRESHOLD, MOMO_BREAKER_RESET)
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client() -> MomoClient:
+    """Process-wide MoMo client, so the connection pool is shared."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MomoClient()
+    return _client
+
+
+def get_async_client() -> AsyncMomoClient:
+    """MoMo client for the running event loop (httpx pools are loop-bound)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncMomoClient()
+    return client
+
 
+def _fresh(token, margin: float | None = None) -> bool:
+    # without a margin, the token's own refresh margin (see _fetch_access_token)
+    if not (token and token["value"]):
+        return False
+    if margin is None:
+        margin = token.get("margin", MOMO_TOKEN_REFRESH_MARGIN)
+    return token["exp"] > time.time() + margin
+
+
+def _fetch_access_token() -> dict:
     if not (MOMO_API_USER and MOMO_API_KEY and MOMO_COLLECTION_SUB_KEY):
-        raise RuntimeError("MoMo env vars missing: MOMO_API_USER/MOMO_API_KEY/MOMO_COLLECTION_SUB_KEY")
+        raise MomoError("MoMo env vars missing: MOMO_API_USER/MOMO_API_KEY/MOMO_COLLECTION_SUB_KEY")
 
-    url = f"{MOMO_BASE_URL}/collection/token/"
+    now = int(time.time())
     basic = base64.b64encode(f"{MOMO_API_USER}:{MOMO_API_KEY}".encode("utf-8")).decode("utf-8")
-    status, payload = _http(
+    status, payload = get_client().call(
+        "token",
         "POST",
-        url,
+        "/collection/token/",
         headers={
             "Authorization": f"Basic {basic}",
             "Ocp-Apim-Subscription-Key": MOMO_COLLECTION_SUB_KEY,
         },
-        data=None,
     )
     if status not in (200, 201):
-        raise RuntimeError(f"Failed to get MoMo token: {status} {payload}")
+        raise MomoError(f"Failed to get MoMo token: {status} {payload}")
 
-    token = payload.get("access_token")
     expires_in = int(payload.get("expires_in", 3600))
-    _token = {"value": token, "exp": now + expires_in}
-    return token
+    # a token that lives shorter than the margin would never count as fresh
+    margin = min(MOMO_TOKEN_REFRESH_MARGIN, expires_in // 2)
+    return {"value": payload.get("access_token"), "exp": now + expires_in, "margin": margin}
 
 
-def request_to_pay(*, amount: str, currency: str, phone: str, external_id: str, payer_message: str, payee_note: str):
+def get_access_token() -> str:
     """
-    Initiates a MoMo sandbox request-to-pay.
-    Returns (reference_id, http_status, response_payload)
+    Return a valid access token, shared by every worker through the cache.
+
+    Tokens are refreshed MOMO_TOKEN_REFRESH_MARGIN seconds before they
+    expire, or half-way through their life if that is shorter. Only the caller holding the cache lock fetches a new one;
+    everybody else keeps using the current token while it is still valid,
+    or waits for the refresh to land.
     """
-    reference_id = str(uuid.uuid4())
-    token = get_access_token()
+    global _token
+    if _fresh(_token):
+        return _token["value"]
+
+    shared = cache.get(TOKEN_CACHE_KEY)
+    deadline = time.monotonic() + MOMO_CONNECT_TIMEOUT + MOMO_READ_TIMEOUT
+    while not _fresh(shared):
+        if cache.add(TOKEN_LOCK_KEY, 1, int(MOMO_CONNECT_TIMEOUT + MOMO_READ_TIMEOUT) + 1):
+            try:
+                # someone may have refreshed between our read and the lock
+                shared = cache.get(TOKEN_CACHE_KEY)
+                if not _fresh(shared):
+                    shared = _fetch_access_token()
+                    cache.set(TOKEN_CACHE_KEY, shared, max(int(shared["exp"] - time.time()), 1))
+            finally:
+                cache.delete(TOKEN_LOCK_KEY)
+            break
+        if _fresh(shared, 30):
+            # refresh in flight elsewhere, the current token still works
+            return shared["value"]
+        if time.monotonic() > deadline:
+            raise MomoError("Timed out waiting for MoMo token refresh")
+        time.sleep(0.05)
+        shared = cache.get(TOKEN_CACHE_KEY)
+
+    _token = shared
+    return _token["value"]
+
 
-    url = f"{MOMO_BASE_URL}/collection/v1_0/requesttopay"
+def _request_to_pay_args(token, reference_id, amount, currency, phone, external_id, payer_message, payee_note):
     headers = {
         "Authorization": f"Bearer {token}",
         "X-Reference-Id": reference_id,
@@ -100,8 +373,18 @@ def request_to_pay(*, amount: str, currency: str, phone: str, external_id: str,
         "payerMessage": payer_message[:160],
         "payeeNote": payee_note[:160],
     }
+    return headers, payload
 
-    status, resp = _http("POST", url, headers=headers, data=payload)
+
+def request_to_pay(*, amount: str, currency: str, phone: str, external_id: str, payer_message: str, payee_note: str):
+    """
+    Initiates a MoMo sandbox request-to-pay.
+    Returns (reference_id, http_status, response_payload)
+    """
+    reference_id = str(uuid.uuid4())
+    token = get_access_token()
+    headers, payload = _request_to_pay_args(token, reference_id, amount, currency, phone, external_id, payer_message, payee_note)
+    status, resp = get_client().call("requesttopay", "POST", "/collection/v1_0/requesttopay", headers=headers, data=payload)
     return reference_id, status, resp
 
 
@@ -111,11 +394,37 @@ def get_request_status(reference_id: str):
     Returns (http_status, response_payload)
     """
     token = get_access_token()
-    url = f"{MOMO_BASE_URL}/collection/v1_0/requesttopay/{reference_id}"
     headers = {
         "Authorization": f"Bearer {token}",
         "X-Target-Environment": MOMO_TARGET_ENV,
         "Ocp-Apim-Subscription-Key": MOMO_COLLECTION_SUB_KEY,
     }
-    status, resp = _http("GET", url, headers=headers, data=None)
+    status, resp = get_client().call("status", "GET", f"/collection/v1_0/requesttopay/{reference_id}", headers=headers)
     return status, resp
+
+
+async def aget_access_token() -> str:
+    if _fresh(_token):
+        return _token["value"]
+    # rare path (once per token lifetime): reuse the cache-locked refresh
+    return await sync_to_async(get_access_token, thread_sensitive=False)()
+
+
+async def arequest_to_pay(*, amount: str, currency: str, phone: str, external_id: str, payer_message: str, payee_note: str):
+    """Async request_to_pay. Returns (reference_id, http_status, response_payload)"""
+    reference_id = str(uuid.uuid4())
+    token = await aget_access_token()
+    headers, payload = _request_to_pay_args(token, reference_id, amount, currency, phone, external_id, payer_message, payee_note)
+    status, resp = await get_async_client().call("requesttopay", "POST", "/collection/v1_0/requesttopay", headers=headers, data=payload)
+    return reference_id, status, resp
+
+
+async def aget_request_status(reference_id: str):
+    """Async get_request_status. Returns (http_status, response_payload)"""
+    token = await aget_access_token()
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "X-Target-Environment": MOMO_TARGET_ENV,
+        "Ocp-Apim-Subscription-Key": MOMO_COLLECTION_SUB_KEY,
+    }
+    return await get_async_client().call("status", "GET", f"/collection/v1_0/requesttopay/{reference_id}", headers=headers)
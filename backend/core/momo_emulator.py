@@ -0,0 +1,330 @@
+"""
+Local emulator of the MTN MoMo Collection API.
+
+Covers what core.momo uses: token issue, request-to-pay, request status
+and the callback to X-Callback-Url. Latency, error rate and how payments
+settle are configurable, so checkout can be load-tested without the MTN
+sandbox:
+
+    with MomoEmulator(latency=0.3, settle_after=2) as emu:
+        # point MOMO_BASE_URL (or core.momo.MOMO_BASE_URL) at emu.base_url
+        ...
+
+or run `python manage.py momo_emulator` and set MOMO_BASE_URL to the
+address it prints. Only the standard library is used.
+"""
+import base64
+import heapq
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PENDING = "PENDING"
+SUCCESSFUL = "SUCCESSFUL"
+FAILED = "FAILED"
+
+# MTN sandbox test numbers and the outcome the sandbox gives them
+SANDBOX_MSISDN_OUTCOMES = {
+    "46733123450": (FAILED, "INTERNAL_PROCESSING_ERROR"),
+    "46733123451": (FAILED, "APPROVAL_REJECTED"),
+    "46733123452": (FAILED, "EXPIRED"),
+    "46733123453": (PENDING, None),
+    "46733123454": (PENDING, None),
+}
+
+_STATUS_PATH = re.compile(r"^/collection/v1_0/requesttopay/([0-9a-fA-F-]{36})$")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MomoEmulator/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict | None = None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return None
+
+    def do_POST(self):
+        body = self._body()
+        emu = self.server.emulator
+        if self.path == "/collection/token/":
+            self._reply(*emu.issue_token(self.headers))
+        elif self.path == "/collection/v1_0/requesttopay":
+            self._reply(*emu.request_to_pay(self.headers, body))
+        else:
+            self._reply(404, {"code": "RESOURCE_NOT_FOUND", "message": "Unknown path"})
+
+    def do_GET(self):
+        match = _STATUS_PATH.match(self.path)
+        if not match:
+            return self._reply(404, {"code": "RESOURCE_NOT_FOUND", "message": "Unknown path"})
+        self._reply(*self.server.emulator.request_status(self.headers, match.group(1)))
+
+
+class MomoEmulator:
+    """
+    In-process MoMo Collection API server.
+
+    Args:
+        latency: seconds every API call takes, plus up to `jitter` more
+        failure_rate: share of requesttopay/status calls answered with a 500
+        settle_after: seconds a payment stays PENDING before it settles
+        success_rate: share of settled payments that end SUCCESSFUL, the
+            rest FAILED (the sandbox test numbers above always win)
+        token_ttl: expires_in of issued access tokens
+        callback_duplicates: extra copies of every callback, as MTN retries
+        callback_retries: redeliveries when the callback gets a non-2xx answer
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        settle_after: float = 1.0,
+        success_rate: float = 1.0,
+        token_ttl: int = 3600,
+        callback_duplicates: int = 0,
+        callback_retries: int = 3,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.settle_after = settle_after
+        self.success_rate = success_rate
+        self.token_ttl = token_ttl
+        self.callback_duplicates = callback_duplicates
+        self.callback_retries = callback_retries
+
+        self.payments = {}
+        self.tokens = {}
+        self._due = []  # heap of (settle_at, reference_id)
+        self.stats = {"token": 0, "requesttopay": 0, "status": 0, "errors": 0, "callbacks": 0, "callback_failures": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._callbacks = ThreadPoolExecutor(max_workers=8, thread_name_prefix="momo-callback")
+
+        self.server = _Server((host, port), _Handler)
+        self.server.emulator = self
+        self._threads = []
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # lifecycle
+
+    def start(self) -> "MomoEmulator":
+        """Serve from background threads; returns self."""
+        for target in (self.server.serve_forever, self._settle_loop):
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def serve_forever(self):
+        """Serve from the calling thread until stop() (used by the management command)."""
+        t = threading.Thread(target=self._settle_loop, daemon=True)
+        t.start()
+        self._threads.append(t)
+        self.server.serve_forever()
+
+    def stop(self):
+        self._stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self._callbacks.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # API behaviour
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._random.uniform(0, self.jitter))
+
+    def _count(self, op: str, injected_failure: bool = False) -> bool:
+        with self._lock:
+            self.stats[op] += 1
+            fail = injected_failure and self._random.random() < self.failure_rate
+            if fail:
+                self.stats["errors"] += 1
+        return fail
+
+    def _authorized(self, headers) -> bool:
+        auth = headers.get("Authorization", "")
+        token = auth[7:] if auth.startswith("Bearer ") else ""
+        exp = self.tokens.get(token)
+        return bool(exp and exp > time.time() and headers.get("Ocp-Apim-Subscription-Key"))
+
+    def issue_token(self, headers):
+        self._count("token")
+        self._delay()
+        auth = headers.get("Authorization", "")
+        try:
+            user, _, key = base64.b64decode(auth[6:]).decode().partition(":") if auth.startswith("Basic ") else ("", "", "")
+        except ValueError:
+            user = key = ""
+        if not (user and key and headers.get("Ocp-Apim-Subscription-Key")):
+            return 401, {"error": "login_failed", "error_description": "Access denied"}
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self.tokens[token] = time.time() + self.token_ttl
+        return 200, {"access_token": token, "token_type": "access_token", "expires_in": self.token_ttl}
+
+    def request_to_pay(self, headers, body):
+        fail = self._count("requesttopay", injected_failure=True)
+        self._delay()
+        if fail:
+            return 500, {"code": "INTERNAL_PROCESSING_ERROR", "message": "Injected failure"}
+        if not self._authorized(headers):
+            return 401, {"statusCode": 401, "message": "Invalid access token"}
+        ref = headers.get("X-Reference-Id", "")
+        try:
+            uuid.UUID(ref)
+        except ValueError:
+            return 400, {"code": "INVALID_REFERENCE_ID", "message": "X-Reference-Id must be a UUID"}
+        payer = (body or {}).get("payer") or {}
+        if not body or not body.get("amount") or not body.get("currency") or not payer.get("partyId"):
+            return 400, {"code": "INVALID_REQUEST", "message": "amount, currency and payer.partyId are required"}
+
+        outcome = SANDBOX_MSISDN_OUTCOMES.get(payer["partyId"])
+        if outcome is None:
+            outcome = (SUCCESSFUL, None) if self._random.random() < self.success_rate else (FAILED, "APPROVAL_REJECTED")
+        with self._lock:
+            if ref in self.payments:
+                return 409, {"code": "RESOURCE_ALREADY_EXIST", "message": "Duplicated reference id"}
+            settle_at = time.monotonic() + self.settle_after
+            self.payments[ref] = {
+                "body": body,
+                "status": PENDING,
+                "outcome": outcome,
+                "settle_at": settle_at,
+                "reason": None,
+                "financial_transaction_id": None,
+                "callback_url": headers.get("X-Callback-Url"),
+            }
+            heapq.heappush(self._due, (settle_at, ref))
+        return 202, None
+
+    def request_status(self, headers, ref: str):
+        fail = self._count("status", injected_failure=True)
+        self._delay()
+        if fail:
+            return 500, {"code": "INTERNAL_PROCESSING_ERROR", "message": "Injected failure"}
+        if not self._authorized(headers):
+            return 401, {"statusCode": 401, "message": "Invalid access token"}
+        self._settle_due()
+        with self._lock:
+            payment = self.payments.get(ref)
+            if payment is None:
+                return 404, {"code": "RESOURCE_NOT_FOUND", "message": "Requested resource was not found."}
+            return 200, self._payload(ref, payment)
+
+    # state transitions
+
+    def set_outcome(self, ref: str, status: str, reason: str | None = None, now: bool = True):
+        """Decide how a payment settles; with now=True it settles immediately."""
+        with self._lock:
+            payment = self.payments[ref]
+            payment["outcome"] = (status, reason)
+            if now:
+                payment["settle_at"] = 0
+                heapq.heappush(self._due, (0, ref))
+        if now:
+            self._settle_due()
+
+    def _payload(self, ref: str, payment: dict) -> dict:
+        body = payment["body"]
+        data = {
+            "referenceId": ref,
+            "amount": body["amount"],
+            "currency": body["currency"],
+            "externalId": body.get("externalId", ""),
+            "payer": body["payer"],
+            "payerMessage": body.get("payerMessage", ""),
+            "payeeNote": body.get("payeeNote", ""),
+            "status": payment["status"],
+        }
+        if payment["financial_transaction_id"]:
+            data["financialTransactionId"] = payment["financial_transaction_id"]
+        if payment["reason"]:
+            data["reason"] = payment["reason"]
+        return data
+
+    def _settle_due(self):
+        now = time.monotonic()
+        settled = []
+        with self._lock:
+            while self._due and self._due[0][0] <= now:
+                settle_at, ref = heapq.heappop(self._due)
+                payment = self.payments[ref]
+                if payment["status"] != PENDING or payment["settle_at"] != settle_at or payment["outcome"][0] == PENDING:
+                    continue
+                payment["status"], payment["reason"] = payment["outcome"]
+                if payment["status"] == SUCCESSFUL:
+                    payment["financial_transaction_id"] = str(self._random.randrange(10**8, 10**9))
+                if payment["callback_url"]:
+                    settled.append((ref, payment["callback_url"], self._payload(ref, payment)))
+        for ref, url, data in settled:
+            for _ in range(1 + self.callback_duplicates):
+                self._callbacks.submit(self._deliver_callback, ref, url, data)
+
+    def _settle_loop(self):
+        while not self._stopped.wait(0.05):
+            self._settle_due()
+
+    def _deliver_callback(self, ref: str, url: str, data: dict):
+        req = urllib.request.Request(
+            url,
+            data=json.dumps(data).encode(),
+            method="POST",
+            headers={"Content-Type": "application/json", "X-Reference-Id": ref},
+        )
+        for attempt in range(1 + self.callback_retries):
+            try:
+                with urllib.request.urlopen(req, timeout=10):
+                    pass
+                with self._lock:
+                    self.stats["callbacks"] += 1
+                return
+            except (urllib.error.URLError, OSError):
+                with self._lock:
+                    self.stats["callback_failures"] += 1
+                if self._stopped.wait(0.5 * (2 ** attempt)):
+                    return
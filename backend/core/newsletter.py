@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import CampaignDelivery, EmailCampaign, NewsletterSubscriber, SiteSettings
+
+logger = logging.getLogger(__name__)
+
+
+def smtp_connection(site_settings):
+    """Mail connection built from the SMTP settings stored in SiteSettings."""
+    return get_connection(
+        host=site_settings.email_host,
+        port=site_settings.email_port,
+        username=site_settings.email_host_user,
+        password=site_settings.email_host_password,
+        use_tls=site_settings.email_use_tls,
+        fail_silently=False,
+    )
+
+
+def _message(campaign, email, site_settings, connection):
+    msg = EmailMultiAlternatives(campaign.subject, strip_tags(campaign.content), f"{site_settings.email_from_name} <{site_settings.email_from_email}>", [email], connection=connection)
+    msg.attach_alternative(f"<html><body>{campaign.content}</body></html>", "text/html")
+    return msg
+
+
+def queue_recipients(campaign) -> int:
+    """
+    Create a PENDING delivery for every recipient of the campaign.
+
+    Subscribers are streamed with .iterator() and inserted in batches, so
+    memory use does not grow with the list size. All batches commit in one
+    transaction: a worker that dies while queueing leaves no deliveries,
+    so the campaign is queued again in full when it is resumed.
+    """
+    subs = NewsletterSubscriber.objects.order_by("id")
+    if campaign.recipient_ids:
+        subs = subs.filter(id__in=campaign.recipient_ids)
+    batch_size = settings.NEWSLETTER_BATCH_SIZE
+    queued = 0
+    batch = []
+    with transaction.atomic():
+        for email in subs.values_list("email", flat=True).iterator(chunk_size=batch_size):
+            batch.append(CampaignDelivery(campaign=campaign, email=email))
+            if len(batch) >= batch_size:
+                CampaignDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+                queued += len(batch)
+                batch = []
+        if batch:
+            CampaignDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            queued += len(batch)
+        EmailCampaign.objects.filter(pk=campaign.pk).update(queued_count=queued)
+    return queued
+
+
+def _send_batch(campaign, deliveries, site_settings):
+    """
+    Send one batch over a single connection; return (sent ids, failed deliveries).
+
+    Raises:
+        Exception: the connection could not be opened; nothing was sent
+    """
+    interval = 1 / settings.NEWSLETTER_SEND_RATE if settings.NEWSLETTER_SEND_RATE else 0
+    sent, failed = [], []
+    connection = smtp_connection(site_settings)
+    connection.open()
+    try:
+        for d in deliveries:
+            started = time.monotonic()
+            try:
+                connection.send_messages([_message(campaign, d.email, site_settings, connection)])
+                sent.append(d.pk)
+            except Exception as e:
+                d.error = str(e)
+                failed.append(d)
+            pause = interval - (time.monotonic() - started)
+            if pause > 0:
+                time.sleep(pause)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _claimable(resume=False):
+    # queued campaigns, and those whose worker made no progress for NEWSLETTER_STALE_AFTER
+    stale = timezone.now() - timedelta(seconds=settings.NEWSLETTER_STALE_AFTER)
+    claimable = Q(status=EmailCampaign.QUEUED) | Q(status=EmailCampaign.SENDING, heartbeat_at__lt=stale)
+    if resume:
+        claimable |= Q(status=EmailCampaign.SENDING)
+    return claimable
+
+
+def deliver_campaign(campaign_id, resume=False):
+    """
+    Send a queued campaign, recording the outcome for each recipient.
+
+    The campaign is claimed with a conditional UPDATE so two workers never
+    send the same campaign; a campaign left in SENDING is claimable again
+    once its heartbeat is NEWSLETTER_STALE_AFTER seconds old. Pending
+    deliveries are sent in batches of NEWSLETTER_BATCH_SIZE, one SMTP
+    connection per batch, at no more than NEWSLETTER_SEND_RATE messages
+    per second. Progress counters and the heartbeat are updated after
+    every batch. If the SMTP connection cannot be opened the batch stays
+    PENDING and the campaign SENDING, so it is retried once it goes stale.
+
+    Args:
+        campaign_id: EmailCampaign pk
+        resume: also pick up a campaign in SENDING that is not stale yet
+
+    Returns:
+        EmailCampaign: the campaign, or None if it was not claimable
+    """
+    now = timezone.now()
+    claimed = EmailCampaign.objects.filter(_claimable(resume), pk=campaign_id).update(
+        status=EmailCampaign.SENDING, started_at=now, heartbeat_at=now
+    )
+    if not claimed:
+        return None
+
+    campaign = EmailCampaign.objects.get(pk=campaign_id)
+    if not campaign.deliveries.exists():
+        queue_recipients(campaign)
+    site_settings = SiteSettings.objects.first() or SiteSettings()
+
+    while True:
+        batch = list(campaign.deliveries.filter(status=CampaignDelivery.PENDING).order_by("id")[:settings.NEWSLETTER_BATCH_SIZE])
+        if not batch:
+            break
+        try:
+            sent, failed = _send_batch(campaign, batch, site_settings)
+        except Exception:
+            logger.exception("Campaign %s: could not connect to the mail server, will retry", campaign_id)
+            return campaign
+        with transaction.atomic():
+            if sent:
+                CampaignDelivery.objects.filter(pk__in=sent).update(status=CampaignDelivery.SENT, sent_at=timezone.now())
+            for d in failed:
+                d.status = CampaignDelivery.FAILED
+            CampaignDelivery.objects.bulk_update(failed, ["status", "error"])
+            EmailCampaign.objects.filter(pk=campaign_id).update(
+                sent_count=F("sent_count") + len(sent),
+                recipients_count=F("recipients_count") + len(sent),
+                failed_count=F("failed_count") + len(failed),
+                heartbeat_at=timezone.now(),
+            )
+        if failed:
+            logger.warning("Campaign %s: %d of %d messages failed in batch", campaign_id, len(failed), len(batch))
+
+    campaign.refresh_from_db()
+    campaign.status = EmailCampaign.FAILED if campaign.failed_count and not campaign.sent_count else EmailCampaign.SENT
+    campaign.finished_at = timezone.now()
+    campaign.save(update_fields=["status", "finished_at"])
+    return campaign
+
+
+def run_pending_campaigns() -> int:
+    """
+    Deliver every queued campaign, oldest first, and resume those left in
+    SENDING by a worker that stopped (see deliver_campaign). Returns how
+    many ran.
+    """
+    done = 0
+    for pk in EmailCampaign.objects.filter(_claimable()).order_by("sent_at").values_list("pk", flat=True):
+        if deliver_campaign(pk):
+            done += 1
+    return done
+
+
+def _deliver_in_thread(campaign_id):
+    try:
+        deliver_campaign(campaign_id)
+    except Exception:
+        logger.exception("Newsletter campaign %s failed", campaign_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_campaign(campaign):
+    """
+    Hand a new campaign to the worker.
+
+    By default the campaign waits for `manage.py send_newsletters`. With
+    NEWSLETTER_INLINE_WORKER it is sent from a background thread in this
+    process once the transaction commits; if the process stops midway, the
+    worker resumes it once it goes stale.
+    """
+    if settings.NEWSLETTER_INLINE_WORKER:
+        transaction.on_commit(lambda: threading.Thread(target=_deliver_in_thread, args=(campaign.pk,), daemon=True).start())
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+# Newest notification id and unread count, shared by every worker. Waiting
+# admins only read these two keys between DB reads. The newest id is only a
+# hint: it expires after NOTIFICATION_LATEST_TTL, so with a per-process
+# cache a notification created by another worker still shows up that soon.
+LATEST_KEY = "admin:notifications:latest"
+UNREAD_KEY = "admin:notifications:unread"
+
+
+def unread_count() -> int:
+    """Number of unread notifications, counted in the DB only on a cache miss."""
+    n = cache.get(UNREAD_KEY)
+    if n is None:
+        n = Notification.objects.filter(read=False).count()
+        cache.add(UNREAD_KEY, n, settings.NOTIFICATION_UNREAD_TTL)
+    return n
+
+
+def latest_notification_id() -> int:
+    """Newest notification id, read from the DB at most once per NOTIFICATION_LATEST_TTL."""
+    latest = cache.get(LATEST_KEY)
+    if latest is None:
+        latest = Notification.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        cache.add(LATEST_KEY, latest, settings.NOTIFICATION_LATEST_TTL)
+    return latest
+
+
+def _published(notification_id: int, unread: bool):
+    if (cache.get(LATEST_KEY) or 0) < notification_id:
+        cache.set(LATEST_KEY, notification_id, settings.NOTIFICATION_LATEST_TTL)
+    if unread:
+        try:
+            cache.incr(UNREAD_KEY)
+        except ValueError:
+            # not cached: the next reader counts it, this row included
+            pass
+
+
+def notification_created(notification):
+    """Tell waiting admins about a new notification once it is committed."""
+    transaction.on_commit(lambda: _published(notification.id, not notification.read))
+
+
+def forget_unread_count():
+    """Drop the cached unread count after a change it cannot follow (edit, delete)."""
+    transaction.on_commit(lambda: cache.delete(UNREAD_KEY))
+
+
+def mark_notification_read(notification) -> bool:
+    """
+    Mark one notification read, decrementing the cached unread count only
+    if this call is the one that changed it.
+    """
+    changed = Notification.objects.filter(pk=notification.pk, read=False).update(read=True)
+    notification.read = True
+    if changed:
+        try:
+            cache.decr(UNREAD_KEY)
+        except ValueError:
+            pass
+    return bool(changed)
+
+
+def mark_all_notifications_read() -> int:
+    changed = Notification.objects.filter(read=False).update(read=True)
+    cache.set(UNREAD_KEY, 0, settings.NOTIFICATION_UNREAD_TTL)
+    return changed
+
+
+def notifications_since(since: int, limit: int = 50) -> dict:
+    """
+    Notifications newer than the `since` cursor (newest first) with the
+    unread count and the cursor to send next time.
+
+    Always asks the DB (a primary key range scan), never the cached newest
+    id, which may lag behind another worker's insert.
+    """
+    rows = list(Notification.objects.filter(id__gt=since).order_by("-id")[:limit])
+    return {
+        "results": rows,
+        "unread_count": unread_count(),
+        "cursor": max([since] + [n.id for n in rows]),
+    }
+
+
+async def await_notifications(since: int, unread: int | None, timeout: float) -> dict:
+    """
+    Long-poll: return as soon as there is a notification newer than
+    `since`, the unread count differs from `unread`, or `timeout` seconds
+    have passed. Waiting reads two cache keys per step, and the DB only
+    when the newest-id hint has expired.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        state = await cache.aget_many([LATEST_KEY, UNREAD_KEY])
+        latest, count = state.get(LATEST_KEY), state.get(UNREAD_KEY)
+        if latest is None or count is None:
+            # cold cache or expired hint: one DB read refills it for every waiter
+            latest = await sync_to_async(latest_notification_id)()
+            count = await sync_to_async(unread_count)()
+        if latest > since or (unread is not None and count != unread) or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(min(settings.NOTIFICATION_POLL_STEP, max(deadline - time.monotonic(), 0)))
+    return await sync_to_async(notifications_since)(since)
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404
+
+from .models import Notification, Order, OrderItem, Product
+from .rollups import record_order_created
+
+
+@transaction.atomic
+def place_order(data) -> Order:
+    """
+    Create an order and its items from validated CreateOrderSerializer data.
+
+    Products are loaded with one query, items are inserted with one
+    bulk_create and the total is computed in memory, so the number of
+    queries does not depend on the size of the cart. Everything runs in
+    one transaction: a missing or inactive product raises Http404 and
+    leaves nothing behind.
+
+    Returns:
+        Order: the new order with `items` (and their products) prefetched
+    """
+    lines = [(item.get("product"), max(int(item.get("qty", 1)), 1)) for item in data["items"]]
+    products = Product.objects.filter(is_active=True).in_bulk({pid for pid, _ in lines if pid is not None})
+    if any(pid not in products for pid, _ in lines):
+        raise Http404("No active product matches the given query.")
+
+    items = [OrderItem(product=products[pid], qty=qty, unit_price=products[pid].price) for pid, qty in lines]
+    order = Order.objects.create(
+        full_name=data["full_name"],
+        phone=data["phone"],
+        email=data.get("email", ""),
+        address=data.get("address", ""),
+        total_amount=sum((it.unit_price * it.qty for it in items), 0),
+    )
+    for it in items:
+        it.order = order
+    OrderItem.objects.bulk_create(items)
+    record_order_created(order)
+    Notification.objects.create(type=Notification.NEW_ORDER, title=f"New Order #{order.reference}", message=f"{order.full_name} - {order.total_amount:,.0f} UGX", link="/admin/orders")
+    prefetch_related_objects([order], Prefetch("items", queryset=OrderItem.objects.select_related("product")))
+    return order
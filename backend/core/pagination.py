@@ -0,0 +1,46 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    DRF cursor pagination with the ordering chosen per view.
+
+    The cursor positions on the first ordering field only: pages are
+    fetched with `WHERE <field> < <position>` and rows that tie on that
+    value are skipped with a small offset, so the field should be
+    (near-)unique and never NULL. Later fields such as `-id` only make
+    the order within a page stable. Cursors are opaque.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+
+
+def wants_pagination(request) -> bool:
+    # Clients that send neither parameter still get the full, bare list
+    params = request.query_params
+    return KeysetPagination.cursor_query_param in params or KeysetPagination.page_size_query_param in params
+
+
+def paginated_response(request, queryset, serializer_class, ordering=("-created_at", "-id"), context=None):
+    """
+    Serialize `queryset` as one cursor page, or as a plain list for
+    clients that have not opted into pagination.
+
+    Args:
+        request: the incoming DRF request
+        queryset: unordered queryset to page through
+        serializer_class: serializer used for each row
+        ordering: fields to order by, the first one drives the cursor
+        context: serializer context
+    """
+    if not wants_pagination(request):
+        return Response(serializer_class(queryset.order_by(*ordering), many=True, context=context).data)
+    paginator = KeysetPagination(ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True, context=context).data)
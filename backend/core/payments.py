@@ -0,0 +1,384 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .cache import ADMIN_DASHBOARD_KEY, invalidate_snapshot_on_commit
+from .models import DigitalAccessToken, MomoCallback, Notification, Order
+from .momo import MomoError, MomoUnavailable, aget_request_status, get_request_status
+from .rollups import record_paid_order
+from .utils import ensure_digital_tokens_for_paid_order
+
+logger = logging.getLogger(__name__)
+
+# MoMo request-to-pay statuses that will not change any more
+FINAL_MOMO_STATUSES = ("SUCCESSFUL", "FAILED", "REJECTED", "TIMEOUT")
+
+# Set by reconciliation on a request MoMo still reported PENDING after
+# MOMO_PENDING_MAX_AGE. Not final: the reconciliation stops polling it,
+# but a late callback or status check still asks MoMo.
+EXPIRED = "EXPIRED"
+
+
+def finalize_payment(order, notify: bool = True) -> bool:
+    """
+    Mark an order PAID and run the PAID side effects exactly once.
+
+    The status is flipped with one conditional UPDATE ... WHERE status !=
+    'PAID'; only the caller whose UPDATE changed the row records the sale
+    in the rollups, issues the digital tokens and (with `notify`) creates
+    the payment notification. Concurrent callers for the same order (status
+    poll, callback, reconciliation, admin) take no row lock and the losers
+    do nothing. `order` is updated in memory either way.
+
+    Returns:
+        bool: True if this call made the order PAID
+    """
+    with transaction.atomic():
+        won = Order.objects.filter(pk=order.pk).exclude(status=Order.PAID).update(status=Order.PAID)
+        order.status = order._loaded_status = Order.PAID
+        if not won:
+            return False
+        record_paid_order(order)
+        ensure_digital_tokens_for_paid_order(order)
+        if notify:
+            Notification.objects.create(type=Notification.PAYMENT_RECEIVED, title=f"Payment - Order #{order.reference}", message=f"{order.total_amount:,.0f} UGX from {order.full_name}", link="/admin/orders")
+        # update() sends no post_save, so drop the dashboard snapshot here
+        invalidate_snapshot_on_commit(ADMIN_DASHBOARD_KEY)
+    return True
+
+
+def apply_momo_status(order, http_status: int, data: dict) -> str:
+    """
+    Store a MoMo status response on the order and mark it PAID on success.
+
+    Returns:
+        str: the MoMo status now on the order
+    """
+    if http_status != 200:
+        return order.momo_status
+    st = (data.get("status") or "").upper()
+    order.momo_status = st
+    if data.get("financialTransactionId"):
+        order.momo_financial_transaction_id = str(data["financialTransactionId"])
+    order.save(update_fields=["momo_status", "momo_financial_transaction_id"])
+    if st == "SUCCESSFUL" and order.status != Order.PAID:
+        finalize_payment(order)
+    return st
+
+
+def _status_key(reference_id: str) -> str:
+    return f"momo:status:{reference_id}"
+
+
+def _snapshot(order) -> dict:
+    downloads = []
+    if order.status == Order.PAID:
+        downloads = [(t.product.name, t.token) for t in DigitalAccessToken.objects.filter(order=order).select_related("product")]
+    return {
+        "order_id": order.id,
+        "order_status": order.status,
+        "momo_status": order.momo_status,
+        "downloads": downloads,
+        "final": order.status == Order.PAID or order.momo_status in (*FINAL_MOMO_STATUSES, EXPIRED),
+    }
+
+
+def forget_payment_status(reference_id: str):
+    """Drop the cached status, e.g. after a callback changed the order."""
+    cache.delete(_status_key(reference_id))
+
+
+def payment_status(reference_id: str) -> dict:
+    """
+    Current status of a MoMo payment, asking MoMo at most once per
+    MOMO_STATUS_TTL seconds per reference however many clients poll.
+
+    Final statuses are cached for MOMO_STATUS_FINAL_TTL and never refreshed.
+
+    Raises:
+        Http404: no order has this reference
+        MomoError: MoMo could not be asked
+    """
+    key = _status_key(reference_id)
+    gate = f"{key}:gate"
+    snap = cache.get(key)
+    if snap and (snap["final"] or not cache.add(gate, 1, settings.MOMO_STATUS_TTL)):
+        return snap
+
+    order = get_object_or_404(Order, momo_reference_id=reference_id)
+    if order.status != Order.PAID and order.momo_status not in FINAL_MOMO_STATUSES:
+        # the gate is ours if we got here with a snapshot; otherwise take it
+        if snap is not None or cache.add(gate, 1, settings.MOMO_STATUS_TTL):
+            apply_momo_status(order, *get_request_status(reference_id))
+
+    snap = _snapshot(order)
+    cache.set(key, snap, settings.MOMO_STATUS_FINAL_TTL if snap["final"] else settings.MOMO_STATUS_TTL * 10)
+    return snap
+
+
+def wait_for_payment_status(reference_id: str, since: str, timeout: float) -> dict:
+    """
+    Long-poll: return as soon as the MoMo status differs from `since`, the
+    payment is final, or `timeout` seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    snap = payment_status(reference_id)
+    while not snap["final"] and snap["momo_status"] == since and time.monotonic() < deadline:
+        time.sleep(min(settings.MOMO_STATUS_POLL_STEP, max(deadline - time.monotonic(), 0)))
+        snap = payment_status(reference_id)
+    return snap
+
+
+async def apayment_status(reference_id: str) -> dict:
+    """Async payment_status for the ASGI views; the MoMo call does not block a thread."""
+    key = _status_key(reference_id)
+    gate = f"{key}:gate"
+    snap = await cache.aget(key)
+    if snap and (snap["final"] or not await cache.aadd(gate, 1, settings.MOMO_STATUS_TTL)):
+        return snap
+
+    try:
+        order = await Order.objects.aget(momo_reference_id=reference_id)
+    except Order.DoesNotExist:
+        raise Http404("No Order matches the given query.")
+    if order.status != Order.PAID and order.momo_status not in FINAL_MOMO_STATUSES:
+        if snap is not None or await cache.aadd(gate, 1, settings.MOMO_STATUS_TTL):
+            http_status, data = await aget_request_status(reference_id)
+            await sync_to_async(apply_momo_status)(order, http_status, data)
+
+    snap = await sync_to_async(_snapshot)(order)
+    await cache.aset(key, snap, settings.MOMO_STATUS_FINAL_TTL if snap["final"] else settings.MOMO_STATUS_TTL * 10)
+    return snap
+
+
+async def await_payment_status(reference_id: str, since: str, timeout: float) -> dict:
+    """Async long-poll; waiting costs no thread, only a sleeping coroutine."""
+    deadline = time.monotonic() + timeout
+    snap = await apayment_status(reference_id)
+    while not snap["final"] and snap["momo_status"] == since and time.monotonic() < deadline:
+        await asyncio.sleep(min(settings.MOMO_STATUS_POLL_STEP, max(deadline - time.monotonic(), 0)))
+        snap = await apayment_status(reference_id)
+    return snap
+
+
+def _check(reference_id):
+    try:
+        return get_request_status(reference_id)
+    except MomoUnavailable:
+        raise
+    except Exception as e:
+        return 0, {"error": True, "raw": str(e)}
+
+
+def reconcile_pending_payments(batch_size=None, workers=None, max_age=None) -> dict:
+    """
+    Resolve orders whose MoMo payment is still PENDING.
+
+    Pending orders are read in batches of `batch_size`, checked against
+    MoMo with up to `workers` concurrent requests, and updated exactly like
+    a status poll (PAID transition, tokens, notification). A request that
+    MoMo still reports PENDING more than `max_age` seconds after
+    momo_initiate is marked EXPIRED, so it is not polled again; one whose
+    check failed is left PENDING. Stops early if the MoMo circuit breaker
+    opens.
+
+    Returns:
+        dict: checked/paid/failed/errors/expired counts, remaining backlog,
+        elapsed seconds and throughput (checks per second)
+    """
+    batch_size = batch_size or settings.MOMO_RECONCILE_BATCH_SIZE
+    workers = workers or settings.MOMO_RECONCILE_WORKERS
+    max_age = settings.MOMO_PENDING_MAX_AGE if max_age is None else max_age
+    started = time.monotonic()
+    expire_before = timezone.now() - timedelta(seconds=max_age)
+    report = {"checked": 0, "paid": 0, "failed": 0, "errors": 0, "expired": 0}
+
+    pending = Order.objects.filter(status=Order.CREATED, momo_status="PENDING").exclude(momo_reference_id="")
+
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(pending.filter(id__gt=last_id).order_by("id")[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            try:
+                results = list(pool.map(_check, [o.momo_reference_id for o in batch]))
+            except MomoUnavailable:
+                report["errors"] += len(batch)
+                break
+            for order, (http_status, data) in zip(batch, results):
+                report["checked"] += 1
+                if http_status != 200:
+                    report["errors"] += 1
+                    continue
+                st = apply_momo_status(order, http_status, data)
+                if st == "PENDING" and order.momo_requested_at and order.momo_requested_at < expire_before:
+                    # only if nothing (a callback, a poll) moved it on in the meantime
+                    if Order.objects.filter(pk=order.pk, status=Order.CREATED, momo_status="PENDING").update(momo_status=EXPIRED):
+                        st = order.momo_status = EXPIRED
+                        report["expired"] += 1
+                if st != "PENDING":
+                    forget_payment_status(order.momo_reference_id)
+                if order.status == Order.PAID:
+                    report["paid"] += 1
+                elif st in FINAL_MOMO_STATUSES:
+                    report["failed"] += 1
+
+    elapsed = time.monotonic() - started
+    report["backlog"] = pending.count()
+    report["elapsed"] = round(elapsed, 3)
+    report["throughput"] = round(report["checked"] / elapsed, 1) if elapsed else 0
+    return report
+
+
+def _verify_key(reference_id: str) -> str:
+    return f"momo:verify:{reference_id}"
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def _verify_in_thread(reference_id):
+    try:
+        verify_momo_callback(reference_id)
+    except Exception:
+        logger.exception("Verifying MoMo callback %s failed", reference_id)
+    finally:
+        cache.delete(_verify_key(reference_id))
+        close_old_connections()
+
+
+def _schedule_verification(reference_id: str):
+    global _verifier
+    # one verification queued or running per payment, however many callbacks arrive
+    if not cache.add(_verify_key(reference_id), 1, settings.MOMO_CALLBACK_CLAIM_TIMEOUT):
+        return
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = ThreadPoolExecutor(max_workers=settings.MOMO_CALLBACK_WORKERS, thread_name_prefix="momo-verify")
+    _verifier.submit(_verify_in_thread, reference_id)
+
+
+def momo_reference(value) -> str | None:
+    """
+    `value` as a MoMo reference id (the UUID we sent as X-Reference-Id),
+    or None if it is not one. Callbacks are unauthenticated, so anything
+    else is ignored before it reaches the inbox.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return None
+
+
+def receive_momo_callback(reference_id: str, payload: dict):
+    """
+    Record a MoMo callback in the inbox and schedule its verification.
+
+    Only writes one row (or bumps its counter for a repeated callback), so
+    the callback can be acknowledged right away. The payment is checked
+    with MoMo later by verify_momo_callback, from the inline thread pool
+    or from `manage.py process_momo_callbacks`.
+    """
+    now = timezone.now()
+    repeated = MomoCallback.objects.filter(reference_id=reference_id).update(
+        received_count=F("received_count") + 1, last_received_at=now
+    )
+    if not repeated:
+        try:
+            with transaction.atomic():
+                MomoCallback.objects.create(reference_id=reference_id, payload=payload, last_received_at=now)
+        except IntegrityError:
+            # a concurrent first callback won the insert
+            MomoCallback.objects.filter(reference_id=reference_id).update(
+                received_count=F("received_count") + 1, last_received_at=now
+            )
+    if settings.MOMO_CALLBACK_INLINE_WORKER:
+        transaction.on_commit(lambda: _schedule_verification(reference_id))
+
+
+def verify_momo_callback(reference_id: str) -> str | None:
+    """
+    Check a received callback's payment with MoMo and apply the result.
+
+    The inbox row is claimed with a conditional UPDATE, so concurrent
+    workers never verify the same payment twice; a processed row is never
+    verified again and an order that is already final is closed without
+    calling MoMo. A payment still PENDING is released for a later retry.
+
+    Returns:
+        str | None: the MoMo status applied, None if there was nothing to do
+
+    Raises:
+        MomoError: MoMo could not be asked (the row is released for retry)
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.MOMO_CALLBACK_CLAIM_TIMEOUT)
+    inbox = MomoCallback.objects.filter(reference_id=reference_id)
+    claimed = inbox.filter(processed_at__isnull=True).filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale)
+    ).update(claimed_at=now, attempts=F("attempts") + 1)
+    if not claimed:
+        return None
+
+    try:
+        order = Order.objects.filter(momo_reference_id=reference_id).first()
+        if order is None:
+            inbox.update(claimed_at=None, processed_at=now, error="No order with this reference")
+            return None
+        st = order.momo_status
+        if order.status != Order.PAID and st not in FINAL_MOMO_STATUSES:
+            http_status, data = get_request_status(reference_id)
+            if http_status != 200:
+                raise MomoError(f"MoMo status check returned {http_status}")
+            st = apply_momo_status(order, http_status, data)
+            forget_payment_status(reference_id)
+    except Exception as e:
+        inbox.update(claimed_at=None, error=str(e)[:500])
+        raise
+
+    done = order.status == Order.PAID or st in FINAL_MOMO_STATUSES
+    inbox.update(claimed_at=None, processed_at=timezone.now() if done else None, error="")
+    return st
+
+
+def process_momo_callbacks(limit: int = 100) -> dict:
+    """
+    Verify inbox rows that are not processed yet (for the worker command).
+
+    Returns:
+        dict: verified/errors counts and the unprocessed backlog
+    """
+    stale = timezone.now() - timedelta(seconds=settings.MOMO_CALLBACK_CLAIM_TIMEOUT)
+    todo = MomoCallback.objects.filter(processed_at__isnull=True).filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale))
+    report = {"verified": 0, "errors": 0}
+    for ref in todo.order_by("last_received_at").values_list("reference_id", flat=True)[:limit]:
+        try:
+            if verify_momo_callback(ref) is not None:
+                report["verified"] += 1
+        except MomoUnavailable:
+            report["errors"] += 1
+            break
+        except Exception:
+            logger.exception("Verifying MoMo callback %s failed", ref)
+            report["errors"] += 1
+    report["backlog"] = MomoCallback.objects.filter(processed_at__isnull=True).count()
+    return report
@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, PositiveIntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def _order_day(order):
+    # Reports bucket orders by the local (Africa/Kampala) day they were placed
+    return timezone.localdate(order.created_at)
+
+
+def _add_to_day(day, **increments):
+    from .models import DailySales
+
+    DailySales.objects.bulk_create([DailySales(date=day)], ignore_conflicts=True)
+    DailySales.objects.filter(date=day).update(**{k: F(k) + v for k, v in increments.items()})
+
+
+def record_order_created(order):
+    """Count a newly created order in its day's rollup."""
+    _add_to_day(_order_day(order), orders=1)
+
+
+def record_paid_order(order):
+    """
+    Add an order that just became PAID to the daily and per-product rollups.
+
+    Must be called exactly once per order, when its status flips to PAID.
+    Runs in the caller's transaction (or its own) so the rollups and the
+    status change commit together.
+
+    Args:
+        order: Order instance that has been paid
+    """
+    from .models import DailyProductSales, OrderItem
+
+    day = _order_day(order)
+    lines = list(
+        OrderItem.objects.filter(order=order)
+        .values("product_id")
+        .annotate(quantity=Sum("qty"), line_revenue=Sum(F("qty") * F("unit_price")))
+        .order_by()
+    )
+    with transaction.atomic():
+        _add_to_day(
+            day,
+            paid_orders=1,
+            revenue=order.total_amount,
+            quantity_sold=sum(line["quantity"] for line in lines),
+        )
+        if not lines:
+            return
+        DailyProductSales.objects.bulk_create(
+            [DailyProductSales(date=day, product_id=line["product_id"]) for line in lines],
+            ignore_conflicts=True,
+        )
+        qty = Case(
+            *[When(product_id=line["product_id"], then=Value(line["quantity"])) for line in lines],
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        )
+        revenue = Case(
+            *[When(product_id=line["product_id"], then=Value(line["line_revenue"])) for line in lines],
+            default=Value(0),
+            output_field=DecimalField(max_digits=14, decimal_places=0),
+        )
+        DailyProductSales.objects.filter(date=day, product_id__in=[line["product_id"] for line in lines]).update(
+            paid_orders=F("paid_orders") + 1,
+            quantity_sold=F("quantity_sold") + qty,
+            revenue=F("revenue") + revenue,
+        )
+
+
+@transaction.atomic
+def rebuild_sales_rollups():
+    """
+    Recompute DailySales and DailyProductSales from every Order/OrderItem.
+
+    Returns:
+        tuple: (days, product_days) rows written
+    """
+    from .models import DailyProductSales, DailySales, Order, OrderItem
+
+    tz = timezone.get_default_timezone()
+    paid = Q(status=Order.PAID)
+    days = {
+        row["day"]: DailySales(
+            date=row["day"],
+            orders=row["orders"],
+            paid_orders=row["paid_orders"],
+            revenue=row["revenue"] or 0,
+        )
+        for row in Order.objects.annotate(day=TruncDate("created_at", tzinfo=tz))
+        .values("day")
+        .annotate(
+            orders=Count("id"),
+            paid_orders=Count("id", filter=paid),
+            revenue=Sum("total_amount", filter=paid),
+        )
+        .order_by()
+    }
+    product_days = []
+    for row in (
+        OrderItem.objects.filter(order__status=Order.PAID)
+        .annotate(day=TruncDate("order__created_at", tzinfo=tz))
+        .values("day", "product_id")
+        .annotate(
+            paid_orders=Count("order_id", distinct=True),
+            quantity=Sum("qty"),
+            line_revenue=Sum(F("qty") * F("unit_price")),
+        )
+        .order_by()
+    ):
+        product_days.append(
+            DailyProductSales(
+                date=row["day"],
+                product_id=row["product_id"],
+                paid_orders=row["paid_orders"],
+                quantity_sold=row["quantity"],
+                revenue=row["line_revenue"],
+            )
+        )
+        days[row["day"]].quantity_sold += row["quantity"]
+
+    DailyProductSales.objects.all().delete()
+    DailySales.objects.all().delete()
+    DailySales.objects.bulk_create(days.values(), batch_size=1000)
+    DailyProductSales.objects.bulk_create(product_days, batch_size=1000)
+    return len(days), len(product_days)
@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import CharField, F, Q
+from django.db.models.functions import Greatest
+from django.db.models.lookups import PatternLookup
+
+# (field, weight) that make up each model's stored search_vector
+BLOG_FIELDS = (("title", "A"), ("excerpt", "B"), ("content", "C"))
+PRODUCT_FIELDS = (("name", "A"), ("description", "B"))
+
+
+def _vector(fields):
+    vector = None
+    for name, weight in fields:
+        part = SearchVector(name, weight=weight, config=settings.SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def blog_vector():
+    return _vector(BLOG_FIELDS)
+
+
+def product_vector():
+    return _vector(PRODUCT_FIELDS)
+
+
+def update_search_vector(instance):
+    """Recompute the stored search_vector of a saved BlogPost or Product."""
+    from .models import BlogPost
+
+    vector = blog_vector() if isinstance(instance, BlogPost) else product_vector()
+    type(instance).objects.filter(pk=instance.pk).update(search_vector=vector)
+
+
+def ranked(queryset, q: str):
+    """`queryset` filtered to rows matching the web-search style query `q`, best match first."""
+    query = SearchQuery(q, search_type="websearch", config=settings.SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(rank=SearchRank(F("search_vector"), query)).order_by("-rank", "-id")
+
+
+def search(queryset, q: str, offset: int = 0, limit: int = None):
+    """
+    One page of `queryset` rows matching the web-search style query `q`,
+    best match first.
+
+    The match runs against the GIN-indexed search_vector column, so the
+    cost depends on the number of hits, not on the size of the table.
+
+    Returns:
+        tuple: (rows, next offset or None)
+    """
+    limit = min(limit or settings.API_PAGE_SIZE, settings.API_MAX_PAGE_SIZE)
+    rows = list(ranked(queryset, q)[offset:offset + limit + 1])
+    return rows[:limit], (offset + limit if len(rows) > limit else None)
+
+
+@CharField.register_lookup
+class TrigramContains(PatternLookup):
+    """
+    `field__trigram_contains=q`: the column contains `q`, in any case.
+
+    Compiles to `"field" ILIKE '%q%'` on the bare column. The built-in
+    icontains compiles to UPPER("field"::text) LIKE UPPER('%q%'), an
+    expression a gin_trgm_ops index on the column cannot serve.
+    """
+    lookup_name = "trigram_contains"
+
+    def get_rhs_op(self, connection, rhs):
+        return f"ILIKE {rhs}"
+
+
+def similar(queryset, fields, q: str):
+    """
+    Rows of `queryset` where any of `fields` contains `q` (any case, so
+    prefixes too) or is similar to it by pg_trgm, closest match first.
+
+    Both tests, `"field" ILIKE '%q%'` and `"field" % 'q'`, are served by
+    the gin_trgm_ops index on each column, so the OR of them is a bitmap
+    OR of index scans. `q` should be at least three characters long;
+    shorter strings have no trigrams to look up.
+    """
+    match = Q()
+    for field in fields:
+        match |= Q(**{f"{field}__trigram_contains": q}) | Q(**{f"{field}__trigram_similar": q})
+    similarities = [TrigramSimilarity(field, q) for field in fields]
+    similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    return queryset.filter(match).annotate(similarity=similarity).order_by("-similarity", "-id")
+
+
+def fuzzy_lookup(queryset, fields, q: str, limit: int = None) -> list:
+    """The first `limit` rows of similar(queryset, fields, q)."""
+    limit = min(limit or settings.API_PAGE_SIZE, settings.API_MAX_PAGE_SIZE)
+    return list(similar(queryset, fields, q)[:limit])
@@ -0,0 +1,194 @@
+"""
+Synthetic data for the query-plan and query-budget tests in core/tests.
+
+`seed(rows)` fills every table an endpoint reads with about `rows` orders
+and proportionate blog posts, notifications, contacts, subscribers and
+callbacks, spread over the last year the way real traffic is (most orders
+paid or abandoned long ago, few unread notifications). Rows are inserted
+with bulk_create, so no signals fire; derived columns (search vectors,
+rollups) are filled in directly.
+Names, references and emails are drawn from `rng` (seeded with `rows`
+by default), so the same call inserts the same data and the planner
+chooses the same plans on every run.
+"""
+import random
+import string
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from .models import (
+    BlogPost,
+    ContactSubmission,
+    DigitalAccessToken,
+    MomoCallback,
+    NewsletterSubscriber,
+    Notification,
+    Order,
+    OrderItem,
+    Product,
+)
+from .rollups import rebuild_sales_rollups
+from .search import blog_vector, product_vector
+
+# Tables that grow with traffic; a sequential scan on one of them is a bug
+LARGE_TABLES = {
+    Order._meta.db_table,
+    OrderItem._meta.db_table,
+    BlogPost._meta.db_table,
+    Notification._meta.db_table,
+    ContactSubmission._meta.db_table,
+    NewsletterSubscriber._meta.db_table,
+    MomoCallback._meta.db_table,
+    DigitalAccessToken._meta.db_table,
+}
+
+# A word only a few seeded posts contain, for selective search queries
+RARE_WORD = "kombucha"
+BATCH = 1000
+
+
+def _random(rng, length: int, chars: str = string.ascii_letters + string.digits) -> str:
+    # drawn from the seeded rng, so every run plans against the same data
+    return "".join(rng.choices(chars, k=length))
+
+
+def _word(rng, length: int) -> str:
+    # distinct names and emails, so a lookup for one of them is selective
+    return _random(rng, length, string.ascii_lowercase)
+
+
+def _backdate(model, objs, when):
+    # auto_now_add overrides created_at on insert, so set it afterwards
+    for obj in objs:
+        obj.created_at = when(obj)
+    model.objects.bulk_update(objs, ["created_at"], batch_size=BATCH)
+
+
+def _order(i: int, rng) -> Order:
+    # 30% paid, 1% waiting on MoMo, most of the rest failed or never paid
+    paid, pending = i % 10 < 3, i % 100 == 99
+    momo_status = "SUCCESSFUL" if paid else "PENDING" if pending else "FAILED" if i % 10 < 8 else ""
+    return Order(
+        reference=_random(rng, 10).upper(),
+        full_name=f"{_word(rng, 6).title()} {_word(rng, 8).title()}",
+        phone=f"2567{_random(rng, 8, string.digits)}",
+        total_amount=0,
+        status=Order.PAID if paid else Order.CREATED,
+        momo_reference_id=_random(rng, 32) if momo_status else "",
+        momo_status=momo_status,
+    )
+
+
+def seed(rows: int, rng=None) -> dict:
+    """
+    Insert a synthetic dataset sized by `rows` orders.
+
+    Returns:
+        dict: sample values for building queries and URLs (an order,
+        a payment reference, a blog slug, a download token, ...)
+    """
+    rng = rng or random.Random(rows)
+    now = timezone.now()
+    day = lambda i: now - timedelta(days=i % 365, seconds=i % 86400)  # noqa: E731
+
+    products = Product.objects.bulk_create(
+        Product(name=f"Seed product {i}", description=f"Seeded {'digital' if i % 2 else 'physical'} product {i}", price=1000 * (i + 1), type=Product.DIGITAL if i % 2 else Product.PHYSICAL)
+        for i in range(20)
+    )
+    Product.objects.filter(id__in=[p.id for p in products]).update(search_vector=product_vector())
+
+    orders = Order.objects.bulk_create((_order(i, rng) for i in range(rows)), batch_size=BATCH)
+    _backdate(Order, orders, lambda o: day(o.id))
+
+    items, tokens = [], []
+    for order in orders:
+        for product in rng.sample(products, 2):
+            items.append(OrderItem(order=order, product=product, qty=rng.randint(1, 3), unit_price=product.price))
+            if order.status == Order.PAID and product.type == Product.DIGITAL:
+                tokens.append(DigitalAccessToken(order=order, product=product, token=_random(rng, 48)))
+    OrderItem.objects.bulk_create(items, batch_size=BATCH)
+    DigitalAccessToken.objects.bulk_create(tokens, batch_size=BATCH)
+    totals = {}
+    for item in items:
+        totals[item.order_id] = totals.get(item.order_id, 0) + item.qty * item.unit_price
+    for order in orders:
+        order.total_amount = totals[order.id]
+    Order.objects.bulk_update(orders, ["total_amount"], batch_size=BATCH)
+
+    posts = BlogPost.objects.bulk_create(
+        (
+            BlogPost(
+                title=f"Seed post {i}" + (f" about {RARE_WORD}" if i % 50 == 0 else ""),
+                slug=f"seed-post-{i}-{_word(rng, 6)}",
+                excerpt=f"Excerpt of seeded post {i}",
+                content=f"Seeded content for post {i}. " * 20,
+                status=BlogPost.PUBLISHED if i % 4 else BlogPost.DRAFT,
+                published_at=day(i) if i % 4 else None,
+            )
+            for i in range(max(rows // 10, 4))
+        ),
+        batch_size=BATCH,
+    )
+    BlogPost.objects.filter(id__in=[p.id for p in posts]).update(search_vector=blog_vector())
+
+    notifications = Notification.objects.bulk_create(
+        (
+            Notification(type=Notification.NEW_ORDER, title=f"New Order #{i}", message="Seeded", read=i % 50 != 0)
+            for i in range(rows)
+        ),
+        batch_size=BATCH,
+    )
+    _backdate(Notification, notifications, lambda n: day(n.id))
+    contacts = ContactSubmission.objects.bulk_create(
+        (
+            ContactSubmission(name=f"{_word(rng, 6).title()} {_word(rng, 8).title()}", email=f"{_word(rng, 10)}@example.com", subject="Seeded", message="Hello", read=i % 20 != 0)
+            for i in range(max(rows // 2, 1))
+        ),
+        batch_size=BATCH,
+    )
+    _backdate(ContactSubmission, contacts, lambda c: day(c.id))
+    subscribers = NewsletterSubscriber.objects.bulk_create(
+        (NewsletterSubscriber(email=f"{_word(rng, 10)}@example.com") for _ in range(max(rows // 2, 1))),
+        batch_size=BATCH,
+    )
+    refs = [o.momo_reference_id for o in orders if o.momo_reference_id]
+    MomoCallback.objects.bulk_create(
+        (
+            MomoCallback(reference_id=ref, processed_at=None if i % 100 == 0 else now, last_received_at=day(i))
+            for i, ref in enumerate(refs[: max(rows // 4, 1)])
+        ),
+        batch_size=BATCH,
+    )
+
+    with connection.cursor() as cursor:
+        # merge the GIN pending lists the bulk inserts left, as autovacuum
+        # would; until then every GIN scan also reads the whole list
+        cursor.execute(
+            "SELECT gin_clean_pending_list(i.indexrelid) FROM pg_index i"
+            " JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_am a ON a.oid = c.relam"
+            " WHERE a.amname = 'gin' AND i.indrelid::regclass::text = ANY(%s)",
+            [sorted(LARGE_TABLES)],
+        )
+        for table in sorted(LARGE_TABLES):
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
+    # after ANALYZE: without statistics the rollup query picks a nested loop
+    rebuild_sales_rollups()
+
+    admin, _ = get_user_model().objects.get_or_create(username="seed-admin", defaults={"is_staff": True, "is_superuser": True})
+    sample = orders[len(orders) // 2]
+    return {
+        "admin": admin,
+        "product": products[1],
+        "order": sample,
+        "unpaid_order": next(o for o in reversed(orders) if o.status == Order.CREATED),
+        "momo_reference_id": next(o.momo_reference_id for o in reversed(orders) if o.momo_reference_id),
+        "paid_reference_id": next(o.momo_reference_id for o in reversed(orders) if o.status == Order.PAID),
+        "post": next(p for p in reversed(posts) if p.status == BlogPost.PUBLISHED),
+        "token": tokens[-1].token if tokens else "",
+        "notification": notifications[-1],
+        "contact": contacts[-1],
+        "subscriber": subscribers[-1],
+    }
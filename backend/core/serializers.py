@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .images import srcset
 from .models import (
     SiteSettings,
     Product,
@@ -13,6 +14,7 @@ from .models import (
 
 class SiteSettingsSerializer(serializers.ModelSerializer):
     logo_url = serializers.SerializerMethodField()
+    logo_srcset = serializers.SerializerMethodField()
     favicon_url = serializers.SerializerMethodField()
     
     class Meta:
@@ -23,6 +25,7 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
             "tagline",
             "logo",
             "logo_url",
+            "logo_srcset",
             "favicon",
             "favicon_url",
             "hero_title",
@@ -81,6 +84,9 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.logo.url)
         return None
     
+    def get_logo_srcset(self, obj):
+        return srcset(self.context.get("request"), obj.logo, obj.logo_variants)
+    
     def get_favicon_url(self, obj):
         if obj.favicon:
             request = self.context.get("request")
@@ -91,6 +97,7 @@ class SiteSettingsSerializer(serializers.ModelSerializer):
 
 class ProductSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
@@ -104,6 +111,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "file",
             "image",
             "image_url",
+            "image_srcset",
             "is_active",
             "created_at",
         ]
@@ -114,11 +122,15 @@ class ProductSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.image.url)
         return None
+    
+    def get_image_srcset(self, obj):
+        return srcset(self.context.get("request"), obj.image, obj.image_variants)
 
 
 class BlogPostListSerializer(serializers.ModelSerializer):
     """Serializer for blog list view"""
     featured_image_url = serializers.SerializerMethodField()
+    featured_image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -128,6 +140,7 @@ class BlogPostListSerializer(serializers.ModelSerializer):
             "slug",
             "featured_image",
             "featured_image_url",
+            "featured_image_srcset",
             "excerpt",
             "status",
             "views",
@@ -141,11 +154,15 @@ class BlogPostListSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.featured_image.url)
         return None
+    
+    def get_featured_image_srcset(self, obj):
+        return srcset(self.context.get("request"), obj.featured_image, obj.featured_image_variants)
 
 
 class BlogPostDetailSerializer(serializers.ModelSerializer):
     """Serializer for blog detail view with full content"""
     featured_image_url = serializers.SerializerMethodField()
+    featured_image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogPost
@@ -155,6 +172,7 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
             "slug",
             "featured_image",
             "featured_image_url",
+            "featured_image_srcset",
             "excerpt",
             "content",
             "status",
@@ -171,6 +189,9 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.featured_image.url)
         return None
+    
+    def get_featured_image_srcset(self, obj):
+        return srcset(self.context.get("request"), obj.featured_image, obj.featured_image_variants)
 
 
 class NewsletterSerializer(serializers.ModelSerializer):
@@ -235,6 +256,6 @@ class EmailCampaignSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = EmailCampaign
-        fields = ['id', 'subject', 'content', 'recipients_count', 'sent_at', 'sent_by', 'sent_by_username']
-        read_only_fields = ['id', 'sent_at', 'sent_by']
+        fields = ['id', 'subject', 'content', 'recipients_count', 'sent_at', 'sent_by', 'sent_by_username', 'status', 'queued_count', 'sent_count', 'failed_count', 'started_at', 'finished_at']
+        read_only_fields = ['id', 'sent_at', 'sent_by', 'status', 'queued_count', 'sent_count', 'failed_count', 'started_at', 'finished_at']
 
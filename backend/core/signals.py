@@ -1,24 +1,54 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from .models import Order, DigitalAccessToken, OrderItem
-from .utils import make_token
-
-def ensure_digital_tokens_for_paid_order(order: Order):
-    if order.status != Order.PAID:
-        return
-
-    items = OrderItem.objects.filter(order=order).select_related("product")
-    for it in items:
-        p = it.product
-        if p.type == "DIGITAL":
-            DigitalAccessToken.objects.get_or_create(
-                order=order,
-                product=p,
-                defaults={"token": make_token(48)}
-            )
+from .cache import ADMIN_DASHBOARD_KEY, bump_catalog_version_on_commit, invalidate_snapshot_on_commit
+from .images import image_fields, schedule_variants
+from .search import update_search_vector
+from .models import Order, SiteSettings, Product, BlogPost, ContactSubmission, Notification
+from .notifications import forget_unread_count, notification_created
+from .utils import ensure_digital_tokens_for_paid_order
 
 @receiver(post_save, sender=Order)
 def create_digital_tokens_on_paid(sender, instance: Order, created, **kwargs):
-    # whenever order is saved as PAID, ensure tokens exist
-    ensure_digital_tokens_for_paid_order(instance)
+    # only the save that flips the order to PAID issues tokens
+    if instance.became_paid:
+        ensure_digital_tokens_for_paid_order(instance)
+    instance._loaded_status = instance.status
+
+@receiver([post_save, post_delete], sender=SiteSettings)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_public_catalog(sender, instance, **kwargs):
+    # settings and products feed the cached public bootstrap/product payloads
+    bump_catalog_version_on_commit()
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=BlogPost)
+def build_image_derivatives(sender, instance, **kwargs):
+    # resized WebP/JPEG variants of a new upload, built after commit
+    for model, image_field, variants_field in image_fields():
+        if model is sender:
+            schedule_variants(instance, image_field, variants_field)
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=BlogPost)
+def refresh_search_vector(sender, instance, **kwargs):
+    update_search_vector(instance)
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=ContactSubmission)
+def invalidate_admin_dashboard(sender, instance, **kwargs):
+    invalidate_snapshot_on_commit(ADMIN_DASHBOARD_KEY)
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, **kwargs):
+    if created:
+        notification_created(instance)
+    else:
+        forget_unread_count()
+
+@receiver(post_delete, sender=Notification)
+def forget_deleted_notification(sender, instance, **kwargs):
+    forget_unread_count()
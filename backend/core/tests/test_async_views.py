@@ -0,0 +1,20 @@
+"""The async MoMo views are rate limited like their sync twins."""
+from django.core.cache import cache
+from django.test import TestCase
+
+
+class AsyncMomoThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_callbacks_are_throttled(self):
+        codes = [self.client.post("/api/momo/async/callback/", {}, content_type="application/json").status_code for _ in range(21)]
+        self.assertEqual(codes, [200] * 20 + [429])
+
+    def test_sync_and_async_views_share_the_limit(self):
+        for _ in range(20):
+            self.client.post("/api/momo/callback/", {}, content_type="application/json")
+        response = self.client.get("/api/momo/async/status/unknown/")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
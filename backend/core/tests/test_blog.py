@@ -0,0 +1,24 @@
+"""The public blog list pages through published posts by published_at."""
+from django.test import TestCase
+
+from core.models import BlogPost
+
+
+class PublicBlogListTests(TestCase):
+    def setUp(self):
+        self.posts = [BlogPost.objects.create(title=f"Post {i}", content="Hello", status=BlogPost.PUBLISHED) for i in range(3)]
+        BlogPost.objects.create(title="Draft", content="Hello")
+
+    def test_publishing_sets_published_at(self):
+        self.assertTrue(all(post.published_at for post in self.posts))
+
+    def test_pages_through_published_posts(self):
+        # a post that lost its date (e.g. an UPDATE outside the model) must not break the cursor
+        BlogPost.objects.filter(pk=self.posts[0].pk).update(published_at=None)
+        seen, url = [], "/api/public/blog/?page_size=1"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [post["id"] for post in response.json()["results"]]
+            url = response.json()["next"]
+        self.assertEqual(seen, [self.posts[2].pk, self.posts[1].pk])
@@ -0,0 +1,49 @@
+"""Buffered hit counters: hits reach the DB once, whatever the cache does meanwhile."""
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.counters import BufferedCounter, blog_views, record_blog_view
+from core.models import BlogPost
+
+
+class BufferedCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.written = []
+        self.counter = BufferedCounter("test", lambda pending: self.written.append(dict(pending)), timeout=60)
+        cache.add("counter:test:gate", 1, 60)  # no flush from record(); the test flushes
+
+    def test_flush_writes_only_members_hit_since_the_last_flush(self):
+        self.counter.record("a", 2)
+        self.counter.record("b")
+        self.counter.record("a")
+        self.assertEqual(self.counter.flush(), 4)
+        self.counter.record("b")
+        self.assertEqual(self.counter.flush(), 1)
+        self.assertEqual(self.counter.flush(), 0)
+        self.assertEqual(self.written, [{"a": 3, "b": 1}, {"b": 1}])
+
+    def test_key_evicted_during_flush(self):
+        def writer(pending):
+            self.written.append(dict(pending))
+            cache.delete(self.counter._key("a"))  # culled while the flush writes
+
+        self.counter.writer = writer
+        self.counter.record("a", 2)
+        self.counter.record("b", 3)
+        self.assertEqual(self.counter.flush(), 5)
+
+        self.counter.record("b")
+        self.counter.flush()
+        self.assertEqual(self.written, [{"a": 2, "b": 3}, {"b": 1}])
+
+    def test_views_of_a_post_unpublished_before_the_flush_are_written(self):
+        post = BlogPost.objects.create(title="Post", content="Hello", status=BlogPost.PUBLISHED)
+        cache.add("counter:blog_views:gate", 1, 60)
+        record_blog_view(post)
+        record_blog_view(post)
+        BlogPost.objects.filter(pk=post.pk).update(status=BlogPost.DRAFT)
+        self.assertEqual(blog_views.flush(), 2)
+        post.refresh_from_db()
+        self.assertEqual(post.views, 2)
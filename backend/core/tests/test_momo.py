@@ -0,0 +1,35 @@
+"""
+MoMo access tokens: a token is reused until its refresh margin, and a token
+that lives shorter than MOMO_TOKEN_REFRESH_MARGIN is still reused instead of
+being fetched again on every call.
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core import momo
+
+
+class AccessTokenTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for name, value in {"MOMO_API_USER": "user", "MOMO_API_KEY": "key", "MOMO_COLLECTION_SUB_KEY": "sub", "_token": {"value": None, "exp": 0}}.items():
+            patcher = mock.patch.object(momo, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _get_tokens(self, expires_in, calls=3):
+        client = mock.Mock()
+        client.call.return_value = (200, {"access_token": "token", "expires_in": expires_in})
+        with mock.patch.object(momo, "get_client", return_value=client):
+            tokens = [momo.get_access_token() for _ in range(calls)]
+        return tokens, client.call.call_count
+
+    def test_token_is_reused(self):
+        self.assertEqual(self._get_tokens(3600), (["token"] * 3, 1))
+
+    def test_short_lived_token_is_reused(self):
+        # shorter than the 300 s default margin
+        self.assertEqual(self._get_tokens(120), (["token"] * 3, 1))
@@ -0,0 +1,84 @@
+"""
+Newsletter delivery: campaigns a worker left in SENDING are resumed, with
+every recipient queued, and an SMTP connection failure leaves the batch to
+be retried.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import CampaignDelivery, EmailCampaign, NewsletterSubscriber, SiteSettings
+from core.newsletter import deliver_campaign, run_pending_campaigns
+
+
+@override_settings(NEWSLETTER_SEND_RATE=0, NEWSLETTER_BATCH_SIZE=2, NEWSLETTER_STALE_AFTER=300)
+class NewsletterDeliveryTests(TestCase):
+    def setUp(self):
+        SiteSettings.objects.create(email_from_email="shop@example.com")
+        NewsletterSubscriber.objects.bulk_create(NewsletterSubscriber(email=f"reader{i}@example.com") for i in range(3))
+        self.campaign = EmailCampaign.objects.create(subject="Hello", content="<p>Hello</p>")
+
+    def _sending(self, heartbeat_ago: int):
+        # as a worker leaves it: claimed, one delivery sent, then no progress
+        deliver_campaign(self.campaign.pk)
+        CampaignDelivery.objects.filter(campaign=self.campaign).update(status=CampaignDelivery.PENDING)
+        CampaignDelivery.objects.filter(campaign=self.campaign, email="reader0@example.com").update(status=CampaignDelivery.SENT)
+        EmailCampaign.objects.filter(pk=self.campaign.pk).update(
+            status=EmailCampaign.SENDING, heartbeat_at=timezone.now() - timedelta(seconds=heartbeat_ago)
+        )
+        mail.outbox.clear()
+
+    def test_queued_campaign_is_sent(self):
+        self.assertEqual(run_pending_campaigns(), 1)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent_count), (EmailCampaign.SENT, 3))
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_stale_sending_campaign_is_resumed(self):
+        self._sending(heartbeat_ago=600)
+        self.assertEqual(run_pending_campaigns(), 1)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, EmailCampaign.SENT)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["reader1@example.com", "reader2@example.com"])
+
+    def test_sending_campaign_with_a_live_worker_is_left_alone(self):
+        self._sending(heartbeat_ago=10)
+        self.assertEqual(run_pending_campaigns(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_connection_failure_leaves_the_batch_pending(self):
+        with mock.patch("core.newsletter.smtp_connection") as connection, self.assertLogs("core.newsletter", "ERROR"):
+            connection.return_value.open.side_effect = OSError("Connection refused")
+            deliver_campaign(self.campaign.pk)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.failed_count), (EmailCampaign.SENDING, 0))
+        self.assertFalse(self.campaign.deliveries.exclude(status=CampaignDelivery.PENDING).exists())
+
+        # once the heartbeat is stale the worker retries and sends everything
+        EmailCampaign.objects.filter(pk=self.campaign.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=600))
+        self.assertEqual(run_pending_campaigns(), 1)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent_count), (EmailCampaign.SENT, 3))
+
+    def test_campaign_interrupted_while_queueing_is_queued_in_full(self):
+        # the worker dies after the first batch of deliveries is inserted
+        bulk_create = CampaignDelivery.objects.bulk_create
+        calls = []
+
+        def dies_on_second_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise SystemExit
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(CampaignDelivery.objects, "bulk_create", side_effect=dies_on_second_batch), self.assertRaises(SystemExit):
+            deliver_campaign(self.campaign.pk)
+        EmailCampaign.objects.filter(pk=self.campaign.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=600))
+
+        self.assertEqual(run_pending_campaigns(), 1)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.queued_count, self.campaign.sent_count), (EmailCampaign.SENT, 3, 3))
+        self.assertEqual(len(mail.outbox), 3)
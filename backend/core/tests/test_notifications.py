@@ -0,0 +1,58 @@
+"""
+The admin bell: a stale cached newest id never hides a notification, and
+the long-poll only holds requests when served over ASGI.
+"""
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Notification
+from core.notifications import await_notifications, latest_notification_id, notifications_since
+
+
+@override_settings(NOTIFICATION_LATEST_TTL=1, NOTIFICATION_POLL_STEP=0.05)
+class StaleLatestIdTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.stale = Notification.objects.create(type=Notification.NEW_ORDER, title="Old", message="Seen").pk
+        latest_notification_id()
+        # on_commit never runs in a TestCase, so the hint misses this row the
+        # way another worker's per-process cache would
+        self.new = Notification.objects.create(type=Notification.NEW_ORDER, title="New", message="Unseen")
+
+    def test_since_reads_the_database(self):
+        page = notifications_since(self.stale)
+        self.assertEqual([n.pk for n in page["results"]], [self.new.pk])
+        self.assertEqual(page["cursor"], self.new.pk)
+
+    def test_long_poll_sees_it_once_the_hint_expires(self):
+        started = time.monotonic()
+        page = async_to_sync(await_notifications)(self.stale, None, 5)
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual([n.pk for n in page["results"]], [self.new.pk])
+
+
+@override_settings(NOTIFICATION_POLL_STEP=0.05)
+class NotificationWaitViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        admin = get_user_model().objects.create_user("admin", is_staff=True)
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(admin).access_token}"}
+
+    def test_wsgi_answers_at_once_and_asks_for_polling(self):
+        started = time.monotonic()
+        response = self.client.get("/api/admin/notifications/wait/", {"since": 0, "unread": 0, "wait": 25}, headers=self.headers)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(response.json()["poll_after"], 30)
+
+    async def test_asgi_holds_the_request(self):
+        started = time.monotonic()
+        response = await self.async_client.get("/api/admin/notifications/wait/", {"since": 0, "unread": 0, "wait": 1}, headers=self.headers)
+        self.assertGreaterEqual(time.monotonic() - started, 1)
+        self.assertEqual(response.json()["poll_after"], 0)
@@ -0,0 +1,187 @@
+"""
+Payment finalization, reconciliation and callbacks: the PAID side effects
+run exactly once however many threads finalize the same order, a request
+is only expired once MoMo says it is still pending, and only well-formed
+callbacks reach the inbox. The sync status view only holds a worker for a
+short wait.
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from core.models import DailyProductSales, DailySales, DigitalAccessToken, MomoCallback, Notification, Order, OrderItem, Product
+from core.payments import EXPIRED, apply_momo_status, finalize_payment, reconcile_pending_payments, verify_momo_callback
+
+# Concurrent finalizations per order
+THREADS = 16
+
+
+class ConcurrentFinalizationTests(TransactionTestCase):
+    # every thread needs its own committed view of the order, so no TestCase transaction
+
+    def setUp(self):
+        self.product = Product.objects.create(name="Finalization test", price=1000, type=Product.DIGITAL)
+        self.order = Order.objects.create(full_name="Finalization test", phone="256700000000", total_amount=2000)
+        OrderItem.objects.create(order=self.order, product=self.product, qty=2, unit_price=1000)
+
+    def _race(self, finalize) -> list:
+        """Call finalize(order, i) from THREADS threads released together; return their results."""
+        barrier = threading.Barrier(THREADS, timeout=30)
+
+        def hit(i):
+            try:
+                order = Order.objects.get(pk=self.order.pk)
+                barrier.wait()
+                return finalize(order, i)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            return list(pool.map(hit, range(THREADS)))
+
+    def assertPaidOnce(self):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.PAID)
+        notes = Notification.objects.filter(type=Notification.PAYMENT_RECEIVED, title=f"Payment - Order #{self.order.reference}")
+        self.assertEqual(notes.count(), 1)
+        self.assertEqual(DigitalAccessToken.objects.filter(order=self.order).count(), 1)
+        day = DailySales.objects.get()
+        self.assertEqual((day.paid_orders, day.revenue, day.quantity_sold), (1, 2000, 2))
+        product_day = DailyProductSales.objects.get(product=self.product)
+        self.assertEqual((product_day.paid_orders, product_day.revenue, product_day.quantity_sold), (1, 2000, 2))
+
+    def test_concurrent_finalize_payment(self):
+        results = self._race(lambda order, i: finalize_payment(order))
+        self.assertEqual(results.count(True), 1)
+        self.assertPaidOnce()
+
+    def test_status_polls_racing_finalize_payment(self):
+        # half the threads come in as a MoMo status poll, half as a direct finalization
+        def finalize(order, i):
+            if i % 2:
+                return finalize_payment(order)
+            apply_momo_status(order, 200, {"status": "SUCCESSFUL", "financialTransactionId": "test"})
+
+        self._race(finalize)
+        self.assertPaidOnce()
+        self.assertEqual(self.order.momo_status, "SUCCESSFUL")
+
+    def test_finalize_after_paid_does_nothing(self):
+        self.assertTrue(finalize_payment(self.order))
+        self.assertFalse(finalize_payment(Order.objects.get(pk=self.order.pk)))
+        self.assertPaidOnce()
+
+
+DAY = 86400
+
+
+def _momo_says(status):
+    return mock.patch("core.payments.get_request_status", return_value=(200, {"status": status}))
+
+
+class ReconcileTests(TestCase):
+    def _pending(self, requested_ago: int) -> Order:
+        return Order.objects.create(
+            full_name="Reconcile test",
+            phone="256700000000",
+            total_amount=1000,
+            momo_reference_id=get_random_string(32),
+            momo_status="PENDING",
+            momo_requested_at=timezone.now() - timedelta(seconds=requested_ago),
+        )
+
+    def test_old_request_still_pending_is_expired(self):
+        old, recent = self._pending(2 * DAY), self._pending(60)
+        with _momo_says("PENDING"):
+            report = reconcile_pending_payments(max_age=DAY)
+        old.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual((old.momo_status, recent.momo_status), (EXPIRED, "PENDING"))
+        self.assertEqual(report["expired"], 1)
+
+    def test_old_request_paid_late_is_not_expired(self):
+        order = self._pending(2 * DAY)
+        with _momo_says("SUCCESSFUL"):
+            report = reconcile_pending_payments(max_age=DAY)
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.momo_status), (Order.PAID, "SUCCESSFUL"))
+        self.assertEqual((report["paid"], report["expired"]), (1, 0))
+
+    def test_age_counts_from_the_payment_request(self):
+        # an order created long ago whose payment was only just requested
+        order = self._pending(60)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=3))
+        with _momo_says("PENDING"):
+            reconcile_pending_payments(max_age=DAY)
+        order.refresh_from_db()
+        self.assertEqual(order.momo_status, "PENDING")
+
+    def test_request_momo_could_not_answer_is_not_expired(self):
+        order = self._pending(2 * DAY)
+        with mock.patch("core.payments.get_request_status", return_value=(500, {})):
+            report = reconcile_pending_payments(max_age=DAY)
+        order.refresh_from_db()
+        self.assertEqual(order.momo_status, "PENDING")
+        self.assertEqual((report["errors"], report["expired"]), (1, 0))
+
+    def test_late_callback_on_expired_request_is_verified(self):
+        order = self._pending(2 * DAY)
+        Order.objects.filter(pk=order.pk).update(momo_status=EXPIRED)
+        MomoCallback.objects.create(reference_id=order.momo_reference_id, last_received_at=timezone.now())
+        with _momo_says("SUCCESSFUL"):
+            self.assertEqual(verify_momo_callback(order.momo_reference_id), "SUCCESSFUL")
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.PAID)
+
+
+@override_settings(MOMO_CALLBACK_INLINE_WORKER=False)
+class MomoCallbackTests(TestCase):
+    URLS = ("/api/momo/callback/", "/api/momo/async/callback/")
+
+    def setUp(self):
+        cache.clear()  # the anon throttle counts in the cache
+        self.addCleanup(cache.clear)
+
+    def test_reference_ids_are_recorded(self):
+        for url in self.URLS:
+            with self.subTest(url):
+                ref = str(uuid.uuid4())
+                response = self.client.post(url, {"referenceId": ref.upper()}, content_type="application/json")
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(MomoCallback.objects.filter(reference_id=ref).exists())
+
+    def test_malformed_callbacks_are_acknowledged_and_ignored(self):
+        bodies = {
+            "too long": {"referenceId": "x" * 65},
+            "not a uuid": {"referenceId": "anything"},
+            "not a string": {"referenceId": 12345},
+            "not an object": [{"referenceId": str(uuid.uuid4())}],
+        }
+        for url in self.URLS:
+            for name, body in bodies.items():
+                with self.subTest(url=url, body=name):
+                    response = self.client.post(url, body, content_type="application/json")
+                    self.assertEqual(response.status_code, 200)
+        self.assertFalse(MomoCallback.objects.exists())
+
+
+class MomoStatusWaitTests(TestCase):
+    def setUp(self):
+        cache.clear()  # the anon throttle counts in the cache
+        self.addCleanup(cache.clear)
+
+    @override_settings(MOMO_STATUS_SYNC_WAIT_MAX=3, MOMO_STATUS_LONGPOLL_MAX=25)
+    def test_sync_wait_is_capped(self):
+        snap = {"order_id": 1, "order_status": Order.CREATED, "momo_status": "PENDING", "downloads": [], "final": False}
+        with mock.patch("core.views.wait_for_payment_status", return_value=snap) as wait:
+            response = self.client.get("/api/momo/status/ref/?wait=25&since=PENDING")
+        self.assertEqual(response.status_code, 200)
+        wait.assert_called_once_with("ref", "PENDING", 3)
@@ -0,0 +1,190 @@
+"""
+Call every API URL against seeded data at two sizes and check its SQL
+query count against query_budgets.json. Times are compared with their
+budgets too, but only reported: wall time depends on the machine.
+
+Run with QUERY_BUDGETS_UPDATE=1 to write the measured counts and times
+as the new budgets instead of checking them, and with
+QUERY_BUDGETS_STRICT_TIME=1 to fail on a time over budget as well.
+"""
+import json
+import math
+import os
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.utils.crypto import get_random_string
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import urls
+from core.models import SiteSettings
+from core.seed import seed
+
+BUDGET_FILE = Path(__file__).resolve().parent / "query_budgets.json"
+PASSWORD = "seed-admin-password"
+
+# Orders seeded for the two runs; a route's query count must not grow between them
+SMALL, LARGE = 50, 500
+
+# A budget allows this many times the measured time, and never less than MIN_MS
+TIME_HEADROOM, MIN_MS = 3, 500
+
+# Statements Django issues for atomic blocks; they are not the view's queries
+SAVEPOINTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+# URLs that cannot run offline, with the reason
+SKIPPED = {
+    "momo/initiate/": "calls the MoMo API",
+    "momo/async/initiate/": "calls the MoMo API",
+}
+
+
+def _request(method, admin=False, kwargs=None, data=None, multipart=False):
+    """How to call one URL: kwargs and data are built from the seed sample."""
+    return {"method": method, "admin": admin, "kwargs": kwargs or (lambda s: {}), "data": data or (lambda s: {}), "multipart": multipart}
+
+
+# route in core/urls.py -> the request that exercises it
+REQUESTS = {
+    "auth/token/": _request("POST", data=lambda s: {"username": s["admin"].username, "password": PASSWORD}),
+    "auth/token/refresh/": _request("POST", data=lambda s: {"refresh": str(RefreshToken.for_user(s["admin"]))}),
+    "public/bootstrap/": _request("GET"),
+    "public/products/": _request("GET"),
+    "public/products/<int:pk>/": _request("GET", kwargs=lambda s: {"pk": s["product"].pk}),
+    "public/blog/": _request("GET"),
+    "public/blog/<slug:slug>/": _request("GET", kwargs=lambda s: {"slug": s["post"].slug}),
+    "public/search/": _request("GET", data=lambda s: {"q": "kombucha"}),
+    "public/newsletter/subscribe/": _request("POST", data=lambda s: {"email": f"{get_random_string(8).lower()}@example.com"}),
+    "public/contact/": _request("POST", data=lambda s: {"name": "Budget", "email": "budget@example.com", "subject": "Hi", "message": "Hello"}),
+    "public/orders/": _request("POST", data=lambda s: {"full_name": "Budget", "phone": "256700000000", "items": [{"product": s["product"].pk, "qty": 2}]}),
+    "admin/dashboard/": _request("GET", admin=True),
+    "admin/search/": _request("GET", admin=True, data=lambda s: {"q": s["order"].reference}),
+    "admin/profile/me/": _request("GET", admin=True),
+    "admin/profile/update/": _request("PUT", admin=True, data=lambda s: {"first_name": "Budget"}),
+    "admin/profile/change-password/": _request("POST", admin=True, data=lambda s: {"current_password": PASSWORD, "new_password": "budget-new-password"}),
+    "admin/settings/": _request("GET", admin=True),
+    "admin/settings/reset-visits/": _request("POST", admin=True),
+    "admin/notifications/": _request("GET", admin=True),
+    "admin/notifications/wait/": _request("GET", admin=True, data=lambda s: {"since": s["notification"].pk, "wait": 0}),
+    "admin/notifications/<int:pk>/": _request("GET", admin=True, kwargs=lambda s: {"pk": s["notification"].pk}),
+    "admin/notifications/<int:pk>/mark-read/": _request("POST", admin=True, kwargs=lambda s: {"pk": s["notification"].pk}),
+    "admin/notifications/mark-all-read/": _request("POST", admin=True),
+    "admin/products/": _request("GET", admin=True),
+    "admin/products/create/": _request("POST", admin=True, data=lambda s: {"name": "Budget", "price": "1000", "type": "PHYSICAL"}, multipart=True),
+    "admin/products/<int:pk>/": _request("PUT", admin=True, kwargs=lambda s: {"pk": s["product"].pk}, data=lambda s: {"name": "Renamed"}, multipart=True),
+    "admin/blog/": _request("GET", admin=True),
+    "admin/blog/create/": _request("POST", admin=True, data=lambda s: {"title": s["post"].title, "content": "Budget"}, multipart=True),
+    "admin/blog/<int:pk>/": _request("GET", admin=True, kwargs=lambda s: {"pk": s["post"].pk}),
+    "admin/orders/": _request("GET", admin=True),
+    "admin/orders/<int:pk>/mark-paid/": _request("POST", admin=True, kwargs=lambda s: {"pk": s["unpaid_order"].pk}),
+    "admin/newsletter/": _request("GET", admin=True),
+    "admin/newsletter/send-test/": _request("POST", admin=True, data=lambda s: {"subject": "Budget", "content": "<p>Hello</p>"}),
+    "admin/newsletter/send/": _request("POST", admin=True, data=lambda s: {"subject": "Budget", "content": "<p>Hello</p>"}),
+    "admin/newsletter/campaigns/": _request("GET", admin=True),
+    "admin/contacts/": _request("GET", admin=True),
+    "admin/contacts/<int:pk>/mark-read/": _request("POST", admin=True, kwargs=lambda s: {"pk": s["contact"].pk}),
+    "admin/reports/sales/": _request("GET", admin=True),
+    "admin/reports/products/": _request("GET", admin=True),
+    # seeded products have no file, so this covers the token lookup up to the 404
+    "download/<str:token>/": _request("GET", kwargs=lambda s: {"token": s["token"]}),
+    "momo/status/<str:reference_id>/": _request("GET", kwargs=lambda s: {"reference_id": s["paid_reference_id"]}),
+    "momo/callback/": _request("POST", data=lambda s: {"referenceId": str(uuid.uuid4())}),
+    "momo/async/status/<str:reference_id>/": _request("GET", kwargs=lambda s: {"reference_id": s["paid_reference_id"]}),
+    "momo/async/callback/": _request("POST", data=lambda s: {"referenceId": str(uuid.uuid4())}),
+}
+
+
+def _path(route: str, kwargs: dict) -> str:
+    return "/api/" + re.sub(r"<(?:\w+:)?(\w+)>", lambda m: str(kwargs[m.group(1)]), route)
+
+
+def _send(client, spec, route, sample, headers):
+    method, data = spec["method"], spec["data"](sample)
+    path = _path(route, spec["kwargs"](sample))
+    if method == "GET":
+        return client.get(path, data, headers=headers)
+    if spec["multipart"]:
+        return client.generic(method, path, encode_multipart(BOUNDARY, data), content_type=MULTIPART_CONTENT, headers=headers)
+    return client.generic(method, path, json.dumps(data), content_type="application/json", headers=headers)
+
+
+def _measure(client, spec, route, sample, headers):
+    """(status, queries, milliseconds) of one request, rolled back afterwards."""
+    cache.clear()
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = _send(client, spec, route, sample, headers)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        transaction.set_rollback(True)
+    queries = [q for q in ctx.captured_queries if not q["sql"].startswith(SAVEPOINTS)]
+    return response.status_code, len(queries), elapsed
+
+
+def _run(routes, rows) -> dict:
+    """Measure every route against `rows` seeded orders, then roll the seed back."""
+    results = {}
+    with transaction.atomic():
+        sample = seed(rows)
+        sample["admin"].email = "seed-admin@example.com"
+        sample["admin"].set_password(PASSWORD)
+        sample["admin"].save()
+        # the newsletter views refuse to send without SMTP settings; tests use the locmem mail backend
+        site_settings = SiteSettings.objects.first() or SiteSettings()
+        site_settings.email_host_user = site_settings.email_from_email = "shop@example.com"
+        site_settings.save()
+        admin_headers = {"Authorization": f"Bearer {RefreshToken.for_user(sample['admin']).access_token}"}
+        client = Client(raise_request_exception=False)
+        for route in routes:
+            spec = REQUESTS[route]
+            results[route] = _measure(client, spec, route, sample, admin_headers if spec["admin"] else {})
+        transaction.set_rollback(True)
+    return results
+
+
+# a private cache, so clearing it between requests touches nothing shared
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "query-budgets"}})
+class QueryBudgetTests(TestCase):
+    def test_every_route_has_a_request(self):
+        routes = [str(p.pattern) for p in urls.urlpatterns]
+        missing = [r for r in routes if r not in REQUESTS and r not in SKIPPED]
+        self.assertFalse(missing, "No request defined for: " + ", ".join(missing))
+
+    def test_routes_within_budget(self):
+        routes = [r for r in REQUESTS if r not in SKIPPED]
+        small = _run(routes, SMALL)
+        large = _run(routes, LARGE)
+
+        if os.getenv("QUERY_BUDGETS_UPDATE"):
+            budgets = {
+                route: {"queries": queries, "ms": max(math.ceil(ms * TIME_HEADROOM), MIN_MS)}
+                for route, (status, queries, ms) in large.items()
+            }
+            BUDGET_FILE.write_text(json.dumps(budgets, indent=2) + "\n")
+            self.skipTest(f"Wrote {len(budgets)} budgets to {BUDGET_FILE.name}")
+
+        budgets = json.loads(BUDGET_FILE.read_text())
+        strict_time = bool(os.getenv("QUERY_BUDGETS_STRICT_TIME"))
+        slow = []
+        for route, (status, queries, ms) in large.items():
+            with self.subTest(route):
+                self.assertLess(status, 500, f"HTTP {status}")
+                self.assertLessEqual(queries, small[route][1], f"queries grow with data ({small[route][1]} -> {queries})")
+                self.assertIn(route, budgets, "no budget (run with QUERY_BUDGETS_UPDATE=1)")
+                self.assertLessEqual(queries, budgets[route]["queries"], f"{queries} queries, budget {budgets[route]['queries']}")
+                if strict_time:
+                    self.assertLessEqual(ms, budgets[route]["ms"], f"{ms:.0f} ms, budget {budgets[route]['ms']} ms")
+                elif ms > budgets[route]["ms"]:
+                    slow.append(f"{route}: {ms:.0f} ms, budget {budgets[route]['ms']} ms")
+        if slow:
+            sys.stderr.write("\nRoutes over their time budget (not a failure without QUERY_BUDGETS_STRICT_TIME):\n  " + "\n  ".join(slow) + "\n")
@@ -0,0 +1,99 @@
+"""
+EXPLAIN each endpoint's main query against seeded data and fail on a
+sequential scan of a large table.
+"""
+import json
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import BlogPost, ContactSubmission, DigitalAccessToken, MomoCallback, NewsletterSubscriber, Notification, Order
+from core.search import ranked, similar
+from core.seed import LARGE_TABLES, RARE_WORD, seed
+
+# Orders seeded; the other tables scale with it
+ROWS = 20000
+
+
+def _plan(queryset) -> dict:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _seq_scans(node):
+    if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+        yield node["Relation Name"]
+    for child in node.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sample = seed(ROWS)
+
+    def assertNoSeqScan(self, queryset):
+        scans = sorted(set(_seq_scans(_plan(queryset))))
+        self.assertFalse(scans, f"Seq Scan on {', '.join(scans)}")
+
+    def test_public_queries(self):
+        post = self.sample["post"]
+        queries = {
+            "public_blog_list": BlogPost.objects.filter(status=BlogPost.PUBLISHED, published_at__isnull=False).order_by("-published_at", "-id")[:50],
+            "public_blog_detail": BlogPost.objects.filter(slug=post.slug, status=BlogPost.PUBLISHED),
+            "public_search": ranked(BlogPost.objects.filter(status=BlogPost.PUBLISHED), RARE_WORD),
+            "download_digital": DigitalAccessToken.objects.select_related("order", "product").filter(token=self.sample["token"]),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name):
+                self.assertNoSeqScan(queryset)
+
+    def test_admin_queries(self):
+        now = timezone.now()
+        queries = {
+            "admin_orders": Order.objects.order_by("-created_at", "-id")[:50],
+            "admin_contacts": ContactSubmission.objects.order_by("-created_at", "-id")[:50],
+            "admin_dashboard unread contacts": ContactSubmission.objects.filter(read=False),
+            "admin_notifications unread": Notification.objects.filter(read=False),
+            "admin_notifications since": Notification.objects.filter(id__gt=self.sample["notification"].id - 50).order_by("-id")[:50],
+            "reports paid orders": Order.objects.filter(status=Order.PAID, created_at__gte=now - timedelta(days=7)),
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name):
+                self.assertNoSeqScan(queryset)
+
+    def test_admin_search(self):
+        order, contact, subscriber = self.sample["order"], self.sample["contact"], self.sample["subscriber"]
+        order_fields = ("reference", "phone", "full_name")
+        lookups = {
+            "orders by reference": (Order, order_fields, order.reference),
+            "orders by reference prefix, any case": (Order, order_fields, order.reference[:5].lower()),
+            "orders by name": (Order, order_fields, order.full_name),
+            "orders by phone ending": (Order, order_fields, order.phone[-7:]),
+            "contacts by email": (ContactSubmission, ("email", "name"), contact.email[:5]),
+            "subscribers by email": (NewsletterSubscriber, ("email",), subscriber.email[:5]),
+        }
+        for name, (model, fields, q) in lookups.items():
+            with self.subTest(name):
+                queryset = similar(model.objects.all(), fields, q)
+                self.assertNoSeqScan(queryset)
+
+    def test_payment_queries(self):
+        now = timezone.now()
+        pending = Order.objects.filter(status=Order.CREATED, momo_status="PENDING").exclude(momo_reference_id="")
+        queries = {
+            "momo_status": Order.objects.filter(momo_reference_id=self.sample["momo_reference_id"]),
+            "reconcile_payments": pending.filter(id__gt=0).order_by("id")[:100],
+            "process_momo_callbacks": MomoCallback.objects.filter(processed_at__isnull=True).filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=now)).order_by("last_received_at")[:100],
+        }
+        for name, queryset in queries.items():
+            with self.subTest(name):
+                self.assertNoSeqScan(queryset)
@@ -0,0 +1,27 @@
+"""Search endpoints reject a limit that cannot make a page."""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class SearchLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()  # the anon throttle counts in the cache
+        self.addCleanup(cache.clear)
+
+    def test_public_search(self):
+        for limit in ("-5", "0"):
+            with self.subTest(limit):
+                response = self.client.get("/api/public/search/", {"q": "tea", "limit": limit})
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/public/search/", {"q": "tea", "limit": "2"}).status_code, 200)
+
+    def test_admin_search(self):
+        admin = get_user_model().objects.create_user("admin", is_staff=True)
+        headers = {"Authorization": f"Bearer {RefreshToken.for_user(admin).access_token}"}
+        for limit in ("-5", "0"):
+            with self.subTest(limit):
+                response = self.client.get("/api/admin/search/", {"q": "tea", "limit": limit}, headers=headers)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/admin/search/", {"q": "tea", "limit": "2"}, headers=headers).status_code, 200)
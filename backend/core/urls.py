@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # Auth
@@ -13,19 +13,22 @@ urlpatterns = [
     path('public/products/<int:pk>/', views.public_product_detail),
     path('public/blog/', views.public_blog_list),
     path('public/blog/<slug:slug>/', views.public_blog_detail),
+    path('public/search/', views.public_search),
     path('public/newsletter/subscribe/', views.subscribe_newsletter),
     path('public/contact/', views.contact_submit),
     path('public/orders/', views.create_order),
 
     # Admin
     path('admin/dashboard/', views.admin_dashboard),
+    path('admin/search/', views.admin_search),
     path('admin/profile/me/', views.admin_profile_me),
     path('admin/profile/update/', views.admin_profile_update),
     path('admin/profile/change-password/', views.admin_change_password),
     path('admin/settings/', views.admin_settings),
     path('admin/settings/reset-visits/', views.admin_reset_visits),
     path('admin/notifications/', views.admin_notifications),
-    path('admin/notifications/<int:pk>/', views.notification_detail.as_view()),
+    path('admin/notifications/wait/', async_views.admin_notifications_wait),
+    path('admin/notifications/<int:pk>/', views.notification_detail),
     path('admin/notifications/<int:pk>/mark-read/', views.admin_notification_mark_read),
     path('admin/notifications/mark-all-read/', views.admin_notifications_mark_all_read),
     path('admin/products/', views.admin_products),
@@ -52,4 +55,9 @@ urlpatterns = [
     path('momo/initiate/', views.momo_initiate),
     path('momo/status/<str:reference_id>/', views.momo_status),
     path('momo/callback/', views.momo_callback),
+
+    # MoMo, async (for the ASGI application)
+    path('momo/async/initiate/', async_views.momo_initiate),
+    path('momo/async/status/<str:reference_id>/', async_views.momo_status),
+    path('momo/async/callback/', async_views.momo_callback),
 ]
@@ -4,65 +4,108 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.throttling import AnonRateThrottle
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.db.models import Sum, Count, Q, Avg, F
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta, datetime
 from django.core.mail import EmailMultiAlternatives
 from django.utils.html import strip_tags
 
-from .momo import request_to_pay, get_request_status
+from .cache import ADMIN_DASHBOARD_KEY, cached_payload, cached_snapshot
+from .pagination import paginated_response
+from .search import fuzzy_lookup, search
+from .downloads import is_resumption, record_download, serve_file
+from .counters import record_blog_view, record_site_visit, site_visits
+from .newsletter import enqueue_campaign
+from .notifications import mark_all_notifications_read, mark_notification_read, notifications_since
+from .orders import place_order
+from .momo import MomoError, request_to_pay
+from .payments import finalize_payment, momo_reference, payment_status, receive_momo_callback, wait_for_payment_status
 from .models import *
 from .serializers import *
 from .permissions import IsAdminUserOrSuper
-from .utils import compute_order_total, ensure_digital_tokens_for_paid_order
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def public_bootstrap(request):
-    settings_obj = SiteSettings.objects.first()
-    products = Product.objects.filter(is_active=True).order_by("created_at")
-    if settings_obj and hasattr(settings_obj, 'visit_tracking_enabled') and settings_obj.visit_tracking_enabled:
-        today = timezone.now().date()
-        visit, created = SiteVisit.objects.get_or_create(date=today)
-        if not created:
-            visit.count += 1
-            visit.save()
-    return Response({
-        "settings": SiteSettingsSerializer(settings_obj, context={"request": request}).data if settings_obj else {},
-        "products": ProductSerializer(products, many=True, context={"request": request}).data
-    })
+    def build():
+        settings_obj = SiteSettings.objects.first()
+        products = Product.objects.filter(is_active=True).order_by("created_at")
+        return {
+            "visit_tracking_enabled": bool(settings_obj and settings_obj.visit_tracking_enabled),
+            "data": {
+                "settings": SiteSettingsSerializer(settings_obj, context={"request": request}).data if settings_obj else {},
+                "products": ProductSerializer(products, many=True, context={"request": request}).data
+            },
+        }
+    payload = cached_payload(request, "bootstrap", build)
+    if payload["visit_tracking_enabled"]:
+        record_site_visit()
+    return Response(payload["data"])
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def public_products(request):
     product_type = request.GET.get("type", "").upper()
-    qs = Product.objects.filter(is_active=True)
-    if product_type in ["PHYSICAL", "DIGITAL"]:
-        qs = qs.filter(type=product_type)
-    return Response(ProductSerializer(qs.order_by("created_at"), many=True, context={"request": request}).data)
+    if product_type not in ["PHYSICAL", "DIGITAL"]:
+        product_type = ""
+    def build():
+        qs = Product.objects.filter(is_active=True)
+        if product_type:
+            qs = qs.filter(type=product_type)
+        return ProductSerializer(qs.order_by("created_at"), many=True, context={"request": request}).data
+    return Response(cached_payload(request, "products", build, product_type))
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def public_product_detail(request, pk):
-    product = get_object_or_404(Product, pk=pk, is_active=True)
-    return Response(ProductSerializer(product, context={"request": request}).data)
+    def build():
+        product = get_object_or_404(Product, pk=pk, is_active=True)
+        return ProductSerializer(product, context={"request": request}).data
+    return Response(cached_payload(request, "product", build, pk))
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def public_blog_list(request):
-    posts = BlogPost.objects.filter(status=BlogPost.PUBLISHED).order_by("-published_at")
-    return Response(BlogPostListSerializer(posts, many=True, context={"request": request}).data)
+    # a NULL published_at would become a NULL cursor; BlogPost.save never leaves one on a published post
+    posts = BlogPost.objects.filter(status=BlogPost.PUBLISHED, published_at__isnull=False)
+    return paginated_response(request, posts, BlogPostListSerializer, ordering=("-published_at", "-id"), context={"request": request})
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def public_blog_detail(request, slug):
     post = get_object_or_404(BlogPost, slug=slug, status=BlogPost.PUBLISHED)
+    record_blog_view(post)
     post.views += 1
-    post.save(update_fields=["views"])
     return Response(BlogPostDetailSerializer(post, context={"request": request}).data)
 
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def public_search(request):
+    # ?q=<terms>&type=blog|products&offset=&limit=, ranked best match first
+    q = (request.GET.get("q") or "").strip()
+    kind = request.GET.get("type", "").lower()
+    try:
+        offset = max(int(request.GET.get("offset", 0)), 0)
+        limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+    except ValueError:
+        return Response({"detail": "Invalid offset or limit"}, status=400)
+    if limit is not None and limit < 1:
+        return Response({"detail": "Invalid offset or limit"}, status=400)
+    if not q:
+        return Response({"detail": "Query is required"}, status=400)
+    data = {"query": q}
+    if kind in ("", "blog"):
+        posts, next_offset = search(BlogPost.objects.filter(status=BlogPost.PUBLISHED), q, offset, limit)
+        data["blog"] = {"results": BlogPostListSerializer(posts, many=True, context={"request": request}).data, "next_offset": next_offset}
+    if kind in ("", "products"):
+        products, next_offset = search(Product.objects.filter(is_active=True), q, offset, limit)
+        data["products"] = {"results": ProductSerializer(products, many=True, context={"request": request}).data, "next_offset": next_offset}
+    return Response(data)
+
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def subscribe_newsletter(request):
@@ -89,39 +132,66 @@ def contact_submit(request):
 def create_order(request):
     serializer = CreateOrderSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    data = serializer.validated_data
-    order = Order.objects.create(full_name=data["full_name"], phone=data["phone"], email=data.get("email", ""), address=data.get("address", ""))
-    for item in data["items"]:
-        product = get_object_or_404(Product, id=item["product"], is_active=True)
-        qty = max(int(item.get("qty", 1)), 1)
-        OrderItem.objects.create(order=order, product=product, qty=qty, unit_price=product.price)
-    order.total_amount = compute_order_total(order)
-    order.save()
-    if hasattr(Notification, 'NEW_ORDER'):
-        Notification.objects.create(type=Notification.NEW_ORDER, title=f"New Order #{order.reference}", message=f"{order.full_name} - {order.total_amount:,.0f} UGX", link="/admin/orders")
+    order = place_order(serializer.validated_data)
     return Response(OrderSerializer(order).data, status=201)
 
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_dashboard(request):
-    total_revenue = Order.objects.filter(status=Order.PAID).aggregate(total=Sum("total_amount"))["total"] or 0
-    total_orders = Order.objects.count()
-    paid_orders = Order.objects.filter(status=Order.PAID).count()
-    pending_orders = Order.objects.filter(status=Order.CREATED).count()
-    product_sales = OrderItem.objects.filter(order__status=Order.PAID).values("product__name").annotate(quantity_sold=Sum("qty"), revenue=Sum("unit_price")).order_by("-revenue")
-    recent_orders = Order.objects.order_by("-created_at")[:10]
-    thirty_days_ago = timezone.now().date() - timedelta(days=30)
+    return Response(cached_snapshot(ADMIN_DASHBOARD_KEY, _dashboard_snapshot, settings.ADMIN_DASHBOARD_CACHE_TIMEOUT))
+
+def _dashboard_snapshot():
+    site_visits.flush()
+    totals = DailySales.objects.aggregate(revenue=Sum("revenue"), orders=Sum("orders"), paid=Sum("paid_orders"))
+    total_revenue = totals["revenue"] or 0
+    total_orders = totals["orders"] or 0
+    paid_orders = totals["paid"] or 0
+    pending_orders = total_orders - paid_orders
+    # Rollup revenue is qty * unit_price per line, not the bare unit price
+    product_sales = DailyProductSales.objects.values("product__name").annotate(quantity_sold=Sum("quantity_sold"), revenue=Sum("revenue")).order_by("-revenue")
+    recent_orders = Order.objects.prefetch_related("items__product").order_by("-created_at")[:10]
+    thirty_days_ago = timezone.localdate() - timedelta(days=30)
     visits = SiteVisit.objects.filter(date__gte=thirty_days_ago).order_by("date")
     visits_data = [{"date": str(v.date), "count": v.count} for v in visits]
-    return Response({
+    blog = BlogPost.objects.aggregate(total=Count("id"), published=Count("id", filter=Q(status=BlogPost.PUBLISHED)))
+    return {
         "revenue": {"total": float(total_revenue), "currency": "UGX"},
         "orders": {"total": total_orders, "paid": paid_orders, "pending": pending_orders},
         "product_sales": list(product_sales),
         "recent_orders": OrderSerializer(recent_orders, many=True).data,
         "site_visits": {"total": sum(v["count"] for v in visits_data), "data": visits_data},
-        "blog": {"total": BlogPost.objects.count(), "published": BlogPost.objects.filter(status=BlogPost.PUBLISHED).count()},
+        "blog": {"total": blog["total"], "published": blog["published"]},
         "contacts": {"unread": ContactSubmission.objects.filter(read=False).count()}
-    })
+    }
+
+# what admin_search looks through: queryset, searched fields, serializer
+ADMIN_LOOKUPS = {
+    "orders": (lambda: Order.objects.prefetch_related("items__product"), ("reference", "phone", "full_name"), OrderSerializer),
+    "contacts": (lambda: ContactSubmission.objects.all(), ("email", "name"), ContactSubmissionSerializer),
+    "subscribers": (lambda: NewsletterSubscriber.objects.all(), ("email",), NewsletterSerializer),
+}
+
+@api_view(["GET"])
+@permission_classes([IsAdminUserOrSuper])
+def admin_search(request):
+    # ?q=<at least 3 chars>&type=orders|contacts|subscribers&limit=, closest match first
+    q = (request.GET.get("q") or "").strip()
+    kind = request.GET.get("type", "").lower()
+    if len(q) < 3:
+        return Response({"detail": "Query must be at least 3 characters"}, status=400)
+    if kind and kind not in ADMIN_LOOKUPS:
+        return Response({"detail": f"Unknown type {kind}"}, status=400)
+    try:
+        limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+    except ValueError:
+        return Response({"detail": "Invalid limit"}, status=400)
+    if limit is not None and limit < 1:
+        return Response({"detail": "Invalid limit"}, status=400)
+    data = {"query": q}
+    for name, (queryset, fields, serializer_class) in ADMIN_LOOKUPS.items():
+        if kind in ("", name):
+            data[name] = serializer_class(fuzzy_lookup(queryset(), fields, q, limit), many=True).data
+    return Response(data)
 
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
@@ -179,9 +249,13 @@ def admin_reset_visits(request):
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_notifications(request):
-    qs = Notification.objects.all()[:50]
-    unread = Notification.objects.filter(read=False).count()
-    return Response({"results": NotificationSerializer(qs, many=True).data, "unread_count": unread})
+    # ?since=<cursor> returns only newer notifications (see admin/notifications/wait/)
+    try:
+        since = int(request.GET.get("since", 0))
+    except ValueError:
+        since = 0
+    data = notifications_since(since)
+    return Response({"results": NotificationSerializer(data["results"], many=True).data, "unread_count": data["unread_count"], "cursor": data["cursor"]})
 
 @api_view(["GET", "PATCH", "DELETE"])
 @permission_classes([IsAdminUserOrSuper])
@@ -206,20 +280,19 @@ def notification_detail(request, pk):
 @permission_classes([IsAdminUserOrSuper])
 def admin_notification_mark_read(request, pk):
     n = get_object_or_404(Notification, pk=pk)
-    n.read = True
-    n.save()
+    mark_notification_read(n)
     return Response(NotificationSerializer(n).data)
 
 @api_view(["POST"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_notifications_mark_all_read(request):
-    Notification.objects.filter(read=False).update(read=True)
+    mark_all_notifications_read()
     return Response({"detail": "All marked read"})
 
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_products(request):
-    return Response(ProductSerializer(Product.objects.all().order_by("-created_at"), many=True, context={"request": request}).data)
+    return paginated_response(request, Product.objects.all(), ProductSerializer, context={"request": request})
 
 @api_view(["POST"])
 @permission_classes([IsAdminUserOrSuper])
@@ -246,7 +319,7 @@ def admin_product_detail(request, pk):
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_blog_list(request):
-    return Response(BlogPostListSerializer(BlogPost.objects.all().order_by("-created_at"), many=True, context={"request": request}).data)
+    return paginated_response(request, BlogPost.objects.all(), BlogPostListSerializer, context={"request": request})
 
 @api_view(["POST"])
 @permission_classes([IsAdminUserOrSuper])
@@ -283,21 +356,20 @@ def admin_blog_detail(request, pk):
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_orders(request):
-    return Response(OrderSerializer(Order.objects.prefetch_related("items__product").order_by("-created_at"), many=True).data)
+    return paginated_response(request, Order.objects.prefetch_related("items__product"), OrderSerializer)
 
 @api_view(["POST"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_mark_paid(request, pk):
-    o = get_object_or_404(Order, pk=pk)
-    o.status = Order.PAID
-    o.save()
-    ensure_digital_tokens_for_paid_order(o)
+    o = get_object_or_404(Order.objects.prefetch_related("items__product"), pk=pk)
+    if o.status != Order.PAID:
+        finalize_payment(o, notify=False)
     return Response(OrderSerializer(o).data)
 
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_newsletter(request):
-    return Response(NewsletterSerializer(NewsletterSubscriber.objects.order_by("-created_at"), many=True).data)
+    return paginated_response(request, NewsletterSubscriber.objects.all(), NewsletterSerializer)
 
 @api_view(["POST"])
 @permission_classes([IsAdminUserOrSuper])
@@ -332,27 +404,19 @@ def admin_send_newsletter(request):
     subs = NewsletterSubscriber.objects.filter(id__in=ids) if ids else NewsletterSubscriber.objects.all()
     if not subs.exists():
         return Response({"detail": "No subscribers"}, status=400)
-    sent = 0
-    for sub in subs:
-        try:
-            msg = EmailMultiAlternatives(subject, strip_tags(content), f"{s.email_from_name} <{s.email_from_email}>", [sub.email])
-            msg.attach_alternative(f"<html><body>{content}</body></html>", "text/html")
-            msg.send()
-            sent += 1
-        except:
-            pass
-    EmailCampaign.objects.create(subject=subject, content=content, recipients_count=sent, sent_by=request.user)
-    return Response({"detail": f"Sent to {sent}"})
+    campaign = EmailCampaign.objects.create(subject=subject, content=content, recipient_ids=ids or [], sent_by=request.user)
+    enqueue_campaign(campaign)
+    return Response({"detail": "Newsletter queued", "campaign": EmailCampaignSerializer(campaign).data}, status=202)
 
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_email_campaigns(request):
-    return Response(EmailCampaignSerializer(EmailCampaign.objects.order_by("-sent_at"), many=True).data)
+    return paginated_response(request, EmailCampaign.objects.select_related("sent_by"), EmailCampaignSerializer, ordering=("-sent_at", "-id"))
 
 @api_view(["GET"])
 @permission_classes([IsAdminUserOrSuper])
 def admin_contacts(request):
-    return Response(ContactSubmissionSerializer(ContactSubmission.objects.order_by("-created_at"), many=True).data)
+    return paginated_response(request, ContactSubmission.objects.all(), ContactSubmissionSerializer)
 
 @api_view(["POST"])
 @permission_classes([IsAdminUserOrSuper])
@@ -362,62 +426,60 @@ def admin_contact_mark_read(request, pk):
     c.save()
     return Response(ContactSubmissionSerializer(c).data)
 
-@api_view(['GET'])
-@permission_classes([IsAdminUserOrSuper])
-def sales_report(request):
+def _report_period(request):
+    """Resolve the report window as aware local datetimes [start, end]."""
+    tz = timezone.get_default_timezone()
     days = int(request.GET.get('days', '30'))
     start_str = request.GET.get('start_date')
     end_str = request.GET.get('end_date')
     if start_str and end_str:
-        start = datetime.strptime(start_str, '%Y-%m-%d')
-        end = datetime.strptime(end_str, '%Y-%m-%d')
+        start = timezone.make_aware(datetime.strptime(start_str, '%Y-%m-%d'), tz)
+        end = timezone.make_aware(datetime.strptime(end_str, '%Y-%m-%d'), tz)
     else:
-        end = timezone.now()
+        end = timezone.localtime(timezone.now(), tz)
         start = end - timedelta(days=days)
-    orders = Order.objects.filter(created_at__gte=start, created_at__lte=end)
-    total = orders.count()
-    paid = orders.filter(status=Order.PAID).count()
-    pending = orders.filter(status=Order.CREATED).count()
-    revenue = orders.filter(status=Order.PAID).aggregate(t=Sum('total_amount'))['t'] or 0
-    avg = orders.filter(status=Order.PAID).aggregate(a=Avg('total_amount'))['a'] or 0
+    return start, end
+
+@api_view(['GET'])
+@permission_classes([IsAdminUserOrSuper])
+def sales_report(request):
+    start, end = _report_period(request)
+    by_day = {row.date: row for row in DailySales.objects.filter(date__range=(start.date(), end.date()))}
+    total = sum(row.orders for row in by_day.values())
+    paid = sum(row.paid_orders for row in by_day.values())
+    revenue = sum(row.revenue for row in by_day.values())
     daily = []
     d = start.date()
     while d <= end.date():
-        day_orders = orders.filter(created_at__date=d, status=Order.PAID)
-        dr = day_orders.aggregate(t=Sum('total_amount'))['t'] or 0
-        dc = day_orders.count()
+        row = by_day.get(d)
+        dr = row.revenue if row else 0
+        dc = row.paid_orders if row else 0
         daily.append({'date': d.isoformat(), 'total_revenue': float(dr), 'order_count': dc, 'avg_order_value': float(dr/dc if dc else 0)})
         d += timedelta(days=1)
-    return Response({'total_revenue': float(revenue), 'total_orders': total, 'paid_orders': paid, 'pending_orders': pending, 'avg_order_value': float(avg), 'conversion_rate': 0, 'daily_revenue': daily, 'period': {'start': start.date().isoformat(), 'end': end.date().isoformat()}})
+    return Response({'total_revenue': float(revenue), 'total_orders': total, 'paid_orders': paid, 'pending_orders': total - paid, 'avg_order_value': float(revenue/paid if paid else 0), 'conversion_rate': 0, 'daily_revenue': daily, 'period': {'start': start.date().isoformat(), 'end': end.date().isoformat()}})
 
 @api_view(['GET'])
 @permission_classes([IsAdminUserOrSuper])
 def products_report(request):
-    days = int(request.GET.get('days', '30'))
-    start_str = request.GET.get('start_date')
-    end_str = request.GET.get('end_date')
-    if start_str and end_str:
-        start = datetime.strptime(start_str, '%Y-%m-%d')
-        end = datetime.strptime(end_str, '%Y-%m-%d')
-    else:
-        end = timezone.now()
-        start = end - timedelta(days=days)
-    items = OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lte=end, order__status=Order.PAID)
-    stats = items.values('product__id', 'product__name', 'product__product_type').annotate(quantity_sold=Sum('qty'), total_revenue=Sum(F('qty') * F('unit_price'))).order_by('-total_revenue')
-    total_qty = items.aggregate(t=Sum('qty'))['t'] or 0
-    total_rev = items.aggregate(t=Sum(F('qty') * F('unit_price')))['t'] or 0
-    products = [{'product_id': s['product__id'], 'name': s['product__name'], 'product_type': s['product__product_type'], 'quantity_sold': s['quantity_sold'], 'total_revenue': float(s['total_revenue'])} for s in stats]
+    start, end = _report_period(request)
+    stats = DailyProductSales.objects.filter(date__range=(start.date(), end.date())).values('product__id', 'product__name', 'product__type').annotate(quantity_sold=Sum('quantity_sold'), total_revenue=Sum('revenue')).order_by('-total_revenue')
+    products = [{'product_id': s['product__id'], 'name': s['product__name'], 'product_type': s['product__type'], 'quantity_sold': s['quantity_sold'], 'total_revenue': float(s['total_revenue'])} for s in stats]
+    total_qty = sum(p['quantity_sold'] for p in products)
+    total_rev = sum(p['total_revenue'] for p in products)
     return Response({'total_quantity_sold': total_qty, 'total_product_revenue': float(total_rev), 'top_products': products, 'period': {'start': start.date().isoformat(), 'end': end.date().isoformat()}})
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def download_digital(request, token):
-    tok = get_object_or_404(DigitalAccessToken, token=token)
+    tok = get_object_or_404(DigitalAccessToken.objects.select_related("order", "product"), token=token)
     if tok.order.status != Order.PAID:
         raise Http404()
     if not tok.product.file:
         raise Http404()
-    return FileResponse(tok.product.file.open("rb"), as_attachment=True, filename=tok.product.file.name.split("/")[-1])
+    response = serve_file(request, tok.product.file, tok.product.file.name.split("/")[-1])
+    if response.status_code in (200, 206) and not is_resumption(request):
+        record_download(tok)
+    return response
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
@@ -427,52 +489,46 @@ def momo_initiate(request):
     if not oid or not payer:
         return Response({"detail": "Missing fields"}, status=400)
     o = get_object_or_404(Order, id=oid)
-    ref = request_to_pay(str(o.total_amount), "UGX", payer, o.reference, f"Pay {o.reference}", "Neesté Order")
+    try:
+        ref, http_status, resp = request_to_pay(amount=str(o.total_amount), currency="UGX", phone=payer, external_id=o.reference, payer_message=f"Pay {o.reference}", payee_note="Neesté Order")
+    except MomoError as e:
+        return Response({"detail": str(e)}, status=503)
+    if http_status != 202:
+        return Response({"detail": "Payment request was not accepted", "momo_http_status": http_status}, status=502)
     o.momo_reference_id = ref
     o.momo_status = "PENDING"
+    o.momo_requested_at = timezone.now()
     o.save()
     return Response({"order_id": o.id, "reference_id": ref, "status": "PENDING"})
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def momo_status(request, reference_id):
-    o = get_object_or_404(Order, momo_reference_id=reference_id)
-    data = get_request_status(reference_id)
-    st = (data.get("status") or "").upper()
-    o.momo_status = st
-    if data.get("financialTransactionId"):
-        o.momo_financial_transaction_id = str(data["financialTransactionId"])
-    if st == "SUCCESSFUL" and o.status != Order.PAID:
-        o.status = Order.PAID
-        o.save()
-        ensure_digital_tokens_for_paid_order(o)
-        if hasattr(Notification, 'PAYMENT_RECEIVED'):
-            Notification.objects.create(type=Notification.PAYMENT_RECEIVED, title=f"Payment - Order #{o.reference}", message=f"{o.total_amount:,.0f} UGX from {o.full_name}", link="/admin/orders")
-    links = []
-    if o.status == Order.PAID:
-        for t in DigitalAccessToken.objects.filter(order=o).select_related("product"):
-            links.append({"product": t.product.name, "url": request.build_absolute_uri(f"/api/download/{t.token}/")})
-    return Response({"order_id": o.id, "order_status": o.status, "momo_status": st, "download_links": links})
+    # ?wait=<seconds> holds the request until the status differs from ?since=.
+    # This view ties up a worker while it waits, so the wait is kept short;
+    # clients that want the full long-poll use momo/async/status/.
+    try:
+        wait = min(float(request.GET.get("wait", 0)), settings.MOMO_STATUS_SYNC_WAIT_MAX)
+    except ValueError:
+        wait = 0
+    try:
+        if wait > 0:
+            since = request.GET.get("since") or "PENDING"
+            snap = wait_for_payment_status(reference_id, since.upper(), wait)
+        else:
+            snap = payment_status(reference_id)
+    except MomoError as e:
+        return Response({"detail": str(e)}, status=503)
+    links = [{"product": name, "url": request.build_absolute_uri(f"/api/download/{token}/")} for name, token in snap["downloads"]]
+    return Response({"order_id": snap["order_id"], "order_status": snap["order_status"], "momo_status": snap["momo_status"], "download_links": links})
 
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def momo_callback(request):
-    # Proper handling
-    ref = request.data.get("referenceId") or request.headers.get("X-Reference-Id")
+    # Acknowledge at once; the payment is verified with MoMo in the background.
+    # Bodies that are not an object and ids that are not a UUID are ignored.
+    data = request.data if isinstance(request.data, dict) else {}
+    ref = momo_reference(data.get("referenceId") or request.headers.get("X-Reference-Id"))
     if ref:
-        try:
-            order = Order.objects.get(momo_reference_id=ref)
-            data = get_request_status(ref)
-            st = data.get("status", "").upper()
-            order.momo_status = st
-            if data.get("financialTransactionId"):
-                order.momo_financial_transaction_id = data.get("financialTransactionId", "")
-            if st == "SUCCESSFUL" and order.status != Order.PAID:
-                order.status = Order.PAID
-                order.save()
-                ensure_digital_tokens_for_paid_order(order)
-                if hasattr(Notification, 'PAYMENT_RECEIVED'):
-                    Notification.objects.create(type=Notification.PAYMENT_RECEIVED, title=f"Payment - Order #{order.reference}", message=f"{order.total_amount:,.0f} UGX from {order.full_name}", link="/admin/orders")
-        except Order.DoesNotExist:
-            pass
-    return Response({"status": "OK"}, status=200)
\ No newline at end of file
+        receive_momo_callback(ref, dict(data.items()))
+    return Response({"status": "OK"}, status=200)
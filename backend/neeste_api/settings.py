@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     "corsheaders",
     "rest_framework",
@@ -66,11 +67,42 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "neeste123"),
         "HOST": os.getenv("DB_HOST", "db"),
         "PORT": os.getenv("DB_PORT", "5432"),
-        "CONN_MAX_AGE": 60,
+        # 0 under ASGI: each request runs on its own thread, so connections
+        # kept open per thread are never reused and pile up to max_connections
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "0")),
         "OPTIONS": {"connect_timeout": 10},
     }
 }
 
+# Cache
+# Point REDIS_URL at a shared Redis so every gunicorn worker sees the same
+# cached payloads and invalidation versions.
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a public bootstrap/products payload may live in the cache.
+# Saves and deletes of SiteSettings/Product invalidate it immediately.
+PUBLIC_CACHE_TIMEOUT = int(os.getenv("PUBLIC_CACHE_TIMEOUT", "300"))
+
+# Seconds the admin dashboard snapshot may be reused (0 disables it).
+# Order, product, blog and contact changes drop it immediately.
+ADMIN_DASHBOARD_CACHE_TIMEOUT = int(os.getenv("ADMIN_DASHBOARD_CACHE_TIMEOUT", "30"))
+
+# Seconds between writes of buffered hit counters (site visits, blog views) to the DB
+COUNTER_FLUSH_INTERVAL = int(os.getenv("COUNTER_FLUSH_INTERVAL", "60"))
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     origin.strip()
@@ -85,6 +117,12 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Digital downloads: "" streams files from Django (with Range/ETag support),
+# "x-accel" hands them to nginx via an internal location mapped to
+# MEDIA_ROOT at DOWNLOAD_ACCEL_PREFIX, "x-sendfile" to Apache/lighttpd.
+DOWNLOAD_SERVE_MODE = os.getenv("DOWNLOAD_SERVE_MODE", "")
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -103,6 +141,51 @@ REST_FRAMEWORK = {
     },
 }
 
+# Newsletter delivery
+# Campaigns are sent by a dedicated worker, `manage.py send_newsletters
+# --loop`. It also resumes campaigns left in SENDING whose heartbeat is
+# NEWSLETTER_STALE_AFTER seconds old (a stopped worker, an SMTP outage);
+# keep that well above the time one batch takes to send. With
+# NEWSLETTER_INLINE_WORKER the web process sends them from a background
+# thread instead.
+NEWSLETTER_INLINE_WORKER = os.getenv("NEWSLETTER_INLINE_WORKER", "False") == "True"
+NEWSLETTER_STALE_AFTER = int(os.getenv("NEWSLETTER_STALE_AFTER", "300"))
+NEWSLETTER_BATCH_SIZE = int(os.getenv("NEWSLETTER_BATCH_SIZE", "100"))
+NEWSLETTER_SEND_RATE = float(os.getenv("NEWSLETTER_SEND_RATE", "10"))  # messages/second, 0 = unlimited
+
+# MoMo payment status polling
+MOMO_STATUS_TTL = int(os.getenv("MOMO_STATUS_TTL", "5"))  # ask MoMo at most this often per payment
+MOMO_STATUS_FINAL_TTL = int(os.getenv("MOMO_STATUS_FINAL_TTL", "3600"))
+MOMO_STATUS_LONGPOLL_MAX = float(os.getenv("MOMO_STATUS_LONGPOLL_MAX", "25"))
+MOMO_STATUS_SYNC_WAIT_MAX = float(os.getenv("MOMO_STATUS_SYNC_WAIT_MAX", "3"))  # the sync view holds a worker; long waits belong on momo/async/status/
+MOMO_STATUS_POLL_STEP = float(os.getenv("MOMO_STATUS_POLL_STEP", "1"))
+
+# Reconciliation of payments left PENDING (`manage.py reconcile_payments`)
+MOMO_RECONCILE_BATCH_SIZE = int(os.getenv("MOMO_RECONCILE_BATCH_SIZE", "100"))
+MOMO_RECONCILE_WORKERS = int(os.getenv("MOMO_RECONCILE_WORKERS", "8"))
+MOMO_PENDING_MAX_AGE = int(os.getenv("MOMO_PENDING_MAX_AGE", "86400"))  # seconds after momo_initiate before a request MoMo still reports PENDING is expired
+
+# MoMo callbacks are stored in an inbox and verified in the background:
+# inline from a thread pool, or by `manage.py process_momo_callbacks --loop`
+# when MOMO_CALLBACK_INLINE_WORKER is False.
+MOMO_CALLBACK_INLINE_WORKER = os.getenv("MOMO_CALLBACK_INLINE_WORKER", "True") == "True"
+MOMO_CALLBACK_WORKERS = int(os.getenv("MOMO_CALLBACK_WORKERS", "4"))
+MOMO_CALLBACK_CLAIM_TIMEOUT = int(os.getenv("MOMO_CALLBACK_CLAIM_TIMEOUT", "60"))  # seconds before a stuck verification is retried
+
+# Admin notifications: cached unread count and the long-poll behind the admin bell
+NOTIFICATION_UNREAD_TTL = int(os.getenv("NOTIFICATION_UNREAD_TTL", "300"))
+NOTIFICATION_LATEST_TTL = int(os.getenv("NOTIFICATION_LATEST_TTL", "5"))  # how stale the cached newest id may get
+NOTIFICATION_LONGPOLL_MAX = float(os.getenv("NOTIFICATION_LONGPOLL_MAX", "25"))
+NOTIFICATION_POLL_STEP = float(os.getenv("NOTIFICATION_POLL_STEP", "0.5"))  # seconds between cache checks
+NOTIFICATION_POLL_INTERVAL = int(os.getenv("NOTIFICATION_POLL_INTERVAL", "30"))  # client poll period when served over WSGI
+
+# PostgreSQL text search configuration used for the blog/product search
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "english")
+
+# Cursor pagination for list endpoints (opt in with ?cursor= or ?page_size=)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
+
 # JWT
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=12),
@@ -73,5 +73,18 @@ export function setAuth(token) {
   }
 }
 
-// Export as default
+// Fetch one page of a cursor-paginated list. Returns the page's results and
+// the cursor of the next page (null on the last page), taken from `next`.
+export async function fetchPage(path, cursor = null, pageSize = 50) {
+  const params = { page_size: pageSize };
+  if (cursor) params.cursor = cursor;
+  const res = await api.get(path, { params });
+  const next = res.data.next
+    ? new URL(res.data.next).searchParams.get("cursor")
+    : null;
+  return { results: res.data.results || [], next };
+}
+
+// Export as default and by name (pages import `{ api }`)
+export { api };
 export default api;
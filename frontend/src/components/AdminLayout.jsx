@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { Outlet, NavLink, Link, useNavigate, useLocation } from "react-router-dom";
 import ProfileDropdown from "./ProfileDropdown.jsx";
 import api from "../api.js";  // ✅ FIXED: Removed curly braces
@@ -10,19 +10,56 @@ export default function AdminLayout() {
   const [unreadCount, setUnreadCount] = useState(0);
   const [showNotifications, setShowNotifications] = useState(false);
 
-  useEffect(() => { 
-    fetchNotifications();
-    
-    // Poll every 30 seconds
-    const interval = setInterval(fetchNotifications, 30000);
-    return () => clearInterval(interval);
+  // Newest notification id and unread count we have, sent with each long-poll
+  const cursor = useRef(0);
+  const unread = useRef(null);
+
+  useEffect(() => {
+    const controller = new AbortController();
+
+    // The server holds each request until something changes, so an idle
+    // admin tab costs one open request instead of a query every 30s. A
+    // server that cannot hold requests (WSGI) answers at once with
+    // poll_after, the seconds to wait before asking again.
+    async function listen() {
+      await fetchNotifications();
+      while (!controller.signal.aborted) {
+        try {
+          const params = { since: cursor.current, wait: 25 };
+          if (unread.current !== null) params.unread = unread.current;
+          const res = await api.get("/admin/notifications/wait/", { params, timeout: 35000, signal: controller.signal });
+          const fresh = res.data.results || [];
+          if (fresh.length) {
+            setNotifications((prev) => [...fresh, ...prev.filter((n) => !fresh.some((f) => f.id === n.id))].slice(0, 50));
+          } else if (res.data.unread_count !== unread.current) {
+            // read elsewhere (another tab, the detail page): reload the read flags
+            await fetchNotifications();
+          }
+          cursor.current = res.data.cursor || cursor.current;
+          unread.current = res.data.unread_count || 0;
+          setUnreadCount(unread.current);
+          if (res.data.poll_after) {
+            await new Promise((resolve) => setTimeout(resolve, res.data.poll_after * 1000));
+          }
+        } catch (error) {
+          if (controller.signal.aborted) break;
+          console.error("Failed to wait for notifications:", error);
+          await new Promise((resolve) => setTimeout(resolve, 5000));
+        }
+      }
+    }
+
+    listen();
+    return () => controller.abort();
   }, []);
 
   async function fetchNotifications() {
     try {
       const res = await api.get("/admin/notifications/");
       setNotifications(res.data.results || res.data || []);
-      setUnreadCount(res.data.unread_count || 0);
+      cursor.current = res.data.cursor || cursor.current;
+      unread.current = res.data.unread_count || 0;
+      setUnreadCount(unread.current);
     } catch (error) {
       console.error("Failed to fetch notifications:", error);
     }
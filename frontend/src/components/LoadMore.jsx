@@ -0,0 +1,17 @@
+import React from "react";
+
+// "Load more" footer for cursor-paginated admin lists (see usePagedList)
+export default function LoadMore({ hasMore, loading, onClick }) {
+  if (!hasMore) return null;
+  return (
+    <div className="py-6 text-center">
+      <button
+        onClick={onClick}
+        disabled={loading}
+        className="px-6 py-2 rounded-xl bg-white/10 text-white hover:bg-white/20 transition-colors text-sm font-medium disabled:opacity-50"
+      >
+        {loading ? "Loading..." : "Load more"}
+      </button>
+    </div>
+  );
+}
@@ -0,0 +1,50 @@
+import { useCallback, useEffect, useState } from 'react';
+import { fetchPage } from '../api.js';
+
+/**
+ * Load a cursor-paginated admin list one page at a time
+ * @param {string} path - API path of the list, e.g. "/admin/orders/"
+ * @returns {Object} items, setItems, loading, loadingMore, hasMore, error, reload, loadMore
+ */
+export function usePagedList(path) {
+  const [items, setItems] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+
+  const reload = useCallback(async () => {
+    try {
+      setLoading(true);
+      setError(null);
+      const page = await fetchPage(path);
+      setItems(page.results);
+      setCursor(page.next);
+    } catch (error) {
+      console.error(`Failed to load ${path}:`, error);
+      setError(error);
+    } finally {
+      setLoading(false);
+    }
+  }, [path]);
+
+  const loadMore = useCallback(async () => {
+    if (!cursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(path, cursor);
+      setItems((prev) => [...prev, ...page.results]);
+      setCursor(page.next);
+    } catch (error) {
+      console.error(`Failed to load more of ${path}:`, error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [path, cursor]);
+
+  useEffect(() => {
+    reload();
+  }, [reload]);
+
+  return { items, setItems, loading, loadingMore, hasMore: !!cursor, error, reload, loadMore };
+}
@@ -1,10 +1,14 @@
 import React, { useEffect, useState } from "react";
 import { api } from "../api.js";
+import { usePagedList } from "../hooks/usePagedList.js";
+import LoadMore from "../components/LoadMore.jsx";
 import ReactQuill from "react-quill";
 import "react-quill/dist/quill.snow.css";
 
 export default function AdminBlog() {
-  const [posts, setPosts] = useState([]);
+  const {
+    items: posts, loadingMore, hasMore, reload: loadPosts, loadMore,
+  } = usePagedList("/admin/blog/");
   const [showForm, setShowForm] = useState(false);
   const [editingPost, setEditingPost] = useState(null);
   const [form, setForm] = useState({
@@ -18,8 +22,6 @@ export default function AdminBlog() {
   const [loading, setLoading] = useState(false);
 
   useEffect(() => {
-    loadPosts();
-    
     // Add custom dark theme styles for Quill editor
     const style = document.createElement('style');
     style.textContent = `
@@ -107,15 +109,6 @@ export default function AdminBlog() {
     };
   }, []);
 
-  async function loadPosts() {
-    try {
-      const res = await api.get("/admin/blog/");
-      setPosts(res.data);
-    } catch (error) {
-      console.error("Failed to load posts:", error);
-    }
-  }
-
   function openCreateForm() {
     setEditingPost(null);
     setForm({
@@ -391,6 +384,7 @@ export default function AdminBlog() {
             </tbody>
           </table>
         )}
+        <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
       </div>
     </div>
   );
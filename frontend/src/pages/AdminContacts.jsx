@@ -1,30 +1,17 @@
-import React, { useState, useEffect } from "react";
+import React from "react";
 import { api } from "../api.js";
+import { usePagedList } from "../hooks/usePagedList.js";
+import LoadMore from "../components/LoadMore.jsx";
 
 export default function AdminContacts() {
-  const [contacts, setContacts] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    fetchContacts();
-  }, []);
-
-  async function fetchContacts() {
-    try {
-      setLoading(true);
-      const res = await api.get("/admin/contacts/");
-      setContacts(res.data);
-    } catch (error) {
-      console.error("Failed to fetch contacts:", error);
-    } finally {
-      setLoading(false);
-    }
-  }
+  const {
+    items: contacts, setItems: setContacts, loading, loadingMore, hasMore, loadMore,
+  } = usePagedList("/admin/contacts/");
 
   async function markAsRead(id) {
     try {
-      await api.post(`/admin/contacts/${id}/mark-read/`);
-      fetchContacts();
+      const res = await api.post(`/admin/contacts/${id}/mark-read/`);
+      setContacts((prev) => prev.map((c) => (c.id === id ? res.data : c)));
     } catch (error) {
       console.error("Failed to mark as read:", error);
     }
@@ -101,6 +88,7 @@ export default function AdminContacts() {
           </table>
         </div>
       </div>
+      <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
     </div>
   );
 }
@@ -1,12 +1,18 @@
-import React, { useState, useEffect } from "react";
+import React, { useState } from "react";
 import ReactQuill from "react-quill";
 import "react-quill/dist/quill.snow.css";
 import { api } from "../api.js";
+import { usePagedList } from "../hooks/usePagedList.js";
+import LoadMore from "../components/LoadMore.jsx";
 
 export default function AdminNewsletter() {
-  const [subscribers, setSubscribers] = useState([]);
-  const [campaigns, setCampaigns] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const subs = usePagedList("/admin/newsletter/");
+  const sent = usePagedList("/admin/newsletter/campaigns/");
+  const subscribers = subs.items;
+  const campaigns = sent.items;
+  const loading = subs.loading || sent.loading;
+  // Subscriber total as far as it is known; "+" while more pages remain
+  const subscriberCount = `${subscribers.length}${subs.hasMore ? "+" : ""}`;
   const [sending, setSending] = useState(false);
   
   const [subject, setSubject] = useState("");
@@ -14,26 +20,6 @@ export default function AdminNewsletter() {
   const [selectedSubscribers, setSelectedSubscribers] = useState([]);
   const [activeTab, setActiveTab] = useState("subscribers");
 
-  useEffect(() => {
-    fetchData();
-  }, []);
-
-  async function fetchData() {
-    try {
-      setLoading(true);
-      const [subsRes, campaignsRes] = await Promise.all([
-        api.get("/admin/newsletter/"),
-        api.get("/admin/email-campaigns/"),
-      ]);
-      setSubscribers(subsRes.data);
-      setCampaigns(campaignsRes.data);
-    } catch (error) {
-      console.error("Failed to fetch data:", error);
-    } finally {
-      setLoading(false);
-    }
-  }
-
   async function handleSendTest() {
     if (!subject || !content) {
       alert("Subject and content are required!");
@@ -59,7 +45,7 @@ export default function AdminNewsletter() {
       return;
     }
     
-    const recipientCount = selectedSubscribers.length || subscribers.length;
+    const recipientCount = selectedSubscribers.length || subscriberCount;
     const message = selectedSubscribers.length
       ? `Send to ${recipientCount} selected subscribers?`
       : `Send to ALL ${recipientCount} subscribers?`;
@@ -78,7 +64,7 @@ export default function AdminNewsletter() {
       setSubject("");
       setContent("");
       setSelectedSubscribers([]);
-      fetchData();
+      sent.reload();
       setActiveTab("campaigns");
     } catch (error) {
       alert(error.response?.data?.detail || "Failed to send newsletter");
@@ -129,7 +115,7 @@ export default function AdminNewsletter() {
               : "text-white/50 hover:text-white/70"
           }`}
         >
-          Subscribers ({subscribers.length})
+          Subscribers ({subscriberCount})
         </button>
         <button
           onClick={() => setActiveTab("compose")}
@@ -149,7 +135,7 @@ export default function AdminNewsletter() {
               : "text-white/50 hover:text-white/70"
           }`}
         >
-          Sent Campaigns ({campaigns.length})
+          Sent Campaigns ({campaigns.length}{sent.hasMore ? "+" : ""})
         </button>
       </div>
 
@@ -214,6 +200,7 @@ export default function AdminNewsletter() {
               )}
             </tbody>
           </table>
+          <LoadMore hasMore={subs.hasMore} loading={subs.loadingMore} onClick={subs.loadMore} />
         </div>
       )}
 
@@ -270,7 +257,7 @@ export default function AdminNewsletter() {
               <div className="text-sm text-white/70">
                 {selectedSubscribers.length > 0
                   ? `Sending to ${selectedSubscribers.length} selected subscriber(s)`
-                  : `Sending to all ${subscribers.length} subscriber(s)`}
+                  : `Sending to all ${subscriberCount} subscriber(s)`}
               </div>
               <div className="flex gap-3">
                 <button
@@ -325,6 +312,7 @@ export default function AdminNewsletter() {
               )}
             </tbody>
           </table>
+          <LoadMore hasMore={sent.hasMore} loading={sent.loadingMore} onClick={sent.loadMore} />
         </div>
       )}
     </div>
@@ -1,32 +1,20 @@
-import React, { useEffect, useState } from "react";
+import React from "react";
 import { useNavigate } from "react-router-dom";
 import { api } from "../api.js";
+import { usePagedList } from "../hooks/usePagedList.js";
+import LoadMore from "../components/LoadMore.jsx";
 
 export default function AdminOrders() {
   const navigate = useNavigate();
-  const [orders, setOrders] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  async function load() {
-    try {
-      setLoading(true);
-      const res = await api.get("/admin/orders/");
-      setOrders(res.data);
-    } catch (error) {
-      console.error("Failed to load orders:", error);
-    } finally {
-      setLoading(false);
-    }
-  }
-
-  useEffect(() => { 
-    load(); 
-  }, []);
+  const {
+    items: orders, setItems: setOrders, loading, loadingMore, hasMore, loadMore,
+  } = usePagedList("/admin/orders/");
 
   async function markPaid(id) {
     try {
-      await api.post(`/admin/orders/${id}/mark-paid/`);
-      load();
+      const res = await api.post(`/admin/orders/${id}/mark-paid/`);
+      // Update in place so the pages already loaded stay on screen
+      setOrders((prev) => prev.map((o) => (o.id === id ? res.data : o)));
     } catch (error) {
       console.error("Failed to mark as paid:", error);
       alert("Failed to mark order as paid. Please try again.");
@@ -54,7 +42,7 @@ export default function AdminOrders() {
         {orders.length > 0 && (
           <div className="px-4 py-2 rounded-xl bg-yellow-400/10 border border-yellow-400/30">
             <span className="text-sm text-yellow-400 font-semibold">
-              {orders.length} order{orders.length !== 1 ? 's' : ''}
+              {orders.length}{hasMore ? '+' : ''} order{orders.length !== 1 ? 's' : ''}
             </span>
           </div>
         )}
@@ -196,6 +184,7 @@ export default function AdminOrders() {
               )}
             </div>
           ))}
+          <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
         </div>
       )}
     </div>
@@ -1,10 +1,13 @@
 import React, { useEffect, useState } from "react";
 import { api } from "../api.js";
+import { usePagedList } from "../hooks/usePagedList.js";
+import LoadMore from "../components/LoadMore.jsx";
 
 export default function AdminProducts() {
-  const [list, setList] = useState([]);
+  const {
+    items: list, loading, loadingMore, hasMore, error, reload: load, loadMore,
+  } = usePagedList("/admin/products/");
   const [msg, setMsg] = useState("");
-  const [loading, setLoading] = useState(true);
 
   const [form, setForm] = useState({
     name: "",
@@ -17,22 +20,9 @@ export default function AdminProducts() {
   const [imageFile, setImageFile] = useState(null);
   const [digitalFile, setDigitalFile] = useState(null);
 
-  async function load() {
-    try {
-      setLoading(true);
-      const res = await api.get("/admin/products/");
-      setList(res.data);
-    } catch (error) {
-      console.error("Failed to load products:", error);
-      setMsg("Failed to load products");
-    } finally {
-      setLoading(false);
-    }
-  }
-
   useEffect(() => {
-    load();
-  }, []);
+    if (error) setMsg("Failed to load products");
+  }, [error]);
 
   async function create() {
     setMsg("");
@@ -228,7 +218,7 @@ export default function AdminProducts() {
 
         {/* Products List */}
         <div className="glass rounded-3xl p-6">
-          <h2 className="text-xl font-semibold text-white mb-4">All Products ({list.length})</h2>
+          <h2 className="text-xl font-semibold text-white mb-4">All Products ({list.length}{hasMore ? "+" : ""})</h2>
 
           {loading ? (
             <div className="text-white/70">Loading products...</div>
@@ -321,6 +311,7 @@ export default function AdminProducts() {
                   </div>
                 </div>
               ))}
+              <LoadMore hasMore={hasMore} loading={loadingMore} onClick={loadMore} />
             </div>
           )}
         </div>
@@ -60,11 +60,20 @@ export default function Blog() {
                   className="glass rounded-3xl overflow-hidden hover:scale-105 transition-transform"
                 >
                   {post.featured_image_url && (
-                    <img
-                      src={post.featured_image_url}
-                      alt={post.title}
-                      className="w-full h-48 object-cover"
-                    />
+                    <picture>
+                      <source
+                        type="image/webp"
+                        srcSet={post.featured_image_srcset?.webp}
+                        sizes="(min-width: 768px) 33vw, 100vw"
+                      />
+                      <img
+                        src={post.featured_image_url}
+                        srcSet={post.featured_image_srcset?.jpeg}
+                        sizes="(min-width: 768px) 33vw, 100vw"
+                        alt={post.title}
+                        className="w-full h-48 object-cover"
+                      />
+                    </picture>
                   )}
                   <div className="p-6">
                     <h2 className="text-xl font-semibold line-clamp-2">
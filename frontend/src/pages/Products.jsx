@@ -52,11 +52,20 @@ export default function Products() {
                 className="glass rounded-3xl overflow-hidden hover:scale-105 transition-transform cursor-pointer"
               >
                 {product.image_url && (
-                  <img
-                    src={product.image_url}
-                    alt={product.name}
-                    className="w-full h-48 object-cover"
-                  />
+                  <picture>
+                    <source
+                      type="image/webp"
+                      srcSet={product.image_srcset?.webp}
+                      sizes="(min-width: 768px) 33vw, 100vw"
+                    />
+                    <img
+                      src={product.image_url}
+                      srcSet={product.image_srcset?.jpeg}
+                      sizes="(min-width: 768px) 33vw, 100vw"
+                      alt={product.name}
+                      className="w-full h-48 object-cover"
+                    />
+                  </picture>
                 )}
                 <div className="p-6">
                   <span className="inline-block px-3 py-1 text-xs font-semibold bg-yellow-500/20 text-yellow-400 rounded-full mb-3">